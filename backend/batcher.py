@@ -0,0 +1,132 @@
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+
+import numpy as np
+from loguru import logger
+
+from backend.config import EMBEDDING_BATCH_SIZE, EMBEDDING_BATCH_WAIT_MS
+from backend.encoder import get_embedding_model
+
+
+def encode_queries(queries: list[str]) -> np.ndarray:
+    """Encode a batch of queries with the shared embedding model."""
+    return get_embedding_model().encode(
+        queries,
+        batch_size=len(queries),
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+    ).astype(np.float32)
+
+
+class EmbeddingBatcher:
+    """Group concurrent query embeddings into batched encoder calls.
+
+    Callers submit single queries and get a future back. A worker thread
+    takes the first waiting query, collects more for up to ``max_wait_ms``
+    or until ``max_batch_size`` queries are waiting, and encodes them in one
+    forward pass. A lone query therefore pays at most ``max_wait_ms`` of
+    extra latency, while a burst of queries shares one encoder call.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = EMBEDDING_BATCH_SIZE,
+        max_wait_ms: float = EMBEDDING_BATCH_WAIT_MS,
+        encode: Callable[[list[str]], np.ndarray] = encode_queries,
+    ) -> None:
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batches = 0
+        self.items = 0
+        self._encode = encode
+        self._queue: queue.Queue[tuple[str, Future] | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        """Start the worker thread on first use."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="embedding-batcher",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def submit(self, query: str) -> Future:
+        """Queue a query and return the future of its embedding."""
+        future: Future = Future()
+        self._ensure_started()
+        self._queue.put((query, future))
+        return future
+
+    def embed(self, query: str) -> np.ndarray:
+        """Embed one query, blocking until its batch has been encoded."""
+        return self.submit(query).result()
+
+    def _collect(self, first: tuple[str, Future]) -> list[tuple[str, Future]]:
+        """Collect queries after ``first`` until the batch is full or the window ends."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the stop signal back so the worker exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        """Encode batches until ``close`` sends the stop signal."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [
+                (query, future)
+                for query, future in self._collect(item)
+                if future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+            try:
+                vectors = self._encode([query for query, _ in batch])
+            except Exception as e:
+                logger.error(f"Embedding a batch of {len(batch)} queries failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), vector in zip(batch, vectors, strict=True):
+                future.set_result(vector)
+
+    def close(self) -> None:
+        """Stop the worker thread once the queued queries are encoded."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def stats(self) -> dict:
+        """Return the batch settings and the mean batch size so far."""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
+
+
+embedding_batcher = EmbeddingBatcher()
@@ -0,0 +1,363 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from loguru import logger
+
+from backend.config import (
+    SEMANTIC_CACHE_BACKEND,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_REDIS_URL,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL,
+)
+from backend.models import QueryResponse
+
+
+@dataclass
+class CacheEntry:
+    """A cached response together with the embedding of its query."""
+
+    embedding: np.ndarray
+    response: dict
+    created_at: float
+
+
+class CacheBackend(ABC):
+    """Storage for cache entries, grouped into partitions.
+
+    A partition holds the entries that may answer each other's queries, i.e.
+    entries sharing the same ``top_k``, metadata filter, tool mode,
+    retrieval mode and reranking. Embeddings are read separately from the
+    responses, so a lookup only fetches the response of its hit.
+    """
+
+    name: str
+
+    @abstractmethod
+    async def embeddings(self, partition: str) -> tuple[list[str], np.ndarray]:
+        """Return the keys and the stacked embeddings of the live entries of a partition."""
+
+    @abstractmethod
+    async def response(self, partition: str, key: str) -> dict | None:
+        """Return the response of an entry, or ``None`` if it is gone."""
+
+    @abstractmethod
+    async def put(self, partition: str, key: str, entry: CacheEntry) -> None:
+        """Store an entry, evicting the least recently used one if full."""
+
+    @abstractmethod
+    async def touch(self, partition: str, key: str) -> None:
+        """Mark an entry as recently used."""
+
+    @abstractmethod
+    async def size(self) -> int:
+        """Return the number of live entries."""
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """In-process LRU storage with a per-entry time to live."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[str, str], CacheEntry] = OrderedDict()
+        self._partitions: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _remove(self, partition: str, key: str) -> None:
+        """Remove an entry; the caller must hold the lock."""
+        self._entries.pop((partition, key), None)
+        keys = self._partitions.get(partition)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._partitions[partition]
+
+    async def embeddings(self, partition: str) -> tuple[list[str], np.ndarray]:
+        """Return the keys and embeddings of a partition, dropping expired entries."""
+        now = time.time()
+        keys, embeddings = [], []
+        with self._lock:
+            for key in list(self._partitions.get(partition, ())):
+                entry = self._entries[(partition, key)]
+                if now - entry.created_at > self.ttl:
+                    self._remove(partition, key)
+                else:
+                    keys.append(key)
+                    embeddings.append(entry.embedding)
+        return keys, np.stack(embeddings) if embeddings else np.empty((0, 0), dtype=np.float32)
+
+    async def response(self, partition: str, key: str) -> dict | None:
+        """Return the response of an entry, or ``None`` if it is gone."""
+        entry = self._entries.get((partition, key))
+        return entry.response if entry is not None else None
+
+    async def put(self, partition: str, key: str, entry: CacheEntry) -> None:
+        """Store an entry, evicting the least recently used one if full."""
+        with self._lock:
+            self._entries[(partition, key)] = entry
+            self._entries.move_to_end((partition, key))
+            self._partitions.setdefault(partition, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                (old_partition, old_key), _ = next(iter(self._entries.items()))
+                self._remove(old_partition, old_key)
+
+    async def touch(self, partition: str, key: str) -> None:
+        """Mark an entry as recently used."""
+        with self._lock:
+            if (partition, key) in self._entries:
+                self._entries.move_to_end((partition, key))
+
+    async def size(self) -> int:
+        """Return the number of stored entries."""
+        return len(self._entries)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Storage in a Redis-compatible server (Redis, Valkey, KeyDB, ...).
+
+    Uses the asyncio client, so cache round-trips never block the event
+    loop. The embeddings of a partition live in one hash, so a lookup reads
+    them without the responses, which are separate keys with a Redis TTL.
+    A sorted set of last-access times gives the LRU order across all
+    partitions, and a sorted set of expiry times lets entries that outlived
+    their TTL be pruned from the hashes and the LRU order.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        url: str,
+        max_entries: int,
+        ttl: float,
+        prefix: str = "semantic-cache",
+    ) -> None:
+        try:
+            import redis.asyncio
+        except ImportError as exc:
+            raise ImportError(
+                "The redis package is required for SEMANTIC_CACHE_BACKEND=redis",
+            ) from exc
+        self._redis = redis.asyncio.Redis.from_url(url)
+        self.max_entries = max_entries
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    def _entry_key(self, partition: str, key: str) -> str:
+        return f"{self.prefix}:entry:{partition}:{key}"
+
+    def _embeddings_key(self, partition: str) -> str:
+        return f"{self.prefix}:embeddings:{partition}"
+
+    @property
+    def _lru_key(self) -> str:
+        return f"{self.prefix}:lru"
+
+    @property
+    def _expiry_key(self) -> str:
+        return f"{self.prefix}:expiry"
+
+    async def _forget(self, members: list[bytes | str]) -> None:
+        """Drop ``"<partition>:<key>"`` members from every index and their responses."""
+        if not members:
+            return
+        pipeline = self._redis.pipeline()
+        for member in members:
+            partition, key = (member.decode() if isinstance(member, bytes) else member).rsplit(":", 1)
+            pipeline.hdel(self._embeddings_key(partition), key)
+            pipeline.delete(self._entry_key(partition, key))
+        pipeline.zrem(self._lru_key, *members)
+        pipeline.zrem(self._expiry_key, *members)
+        await pipeline.execute()
+
+    async def _prune(self) -> None:
+        """Drop the entries whose TTL has passed."""
+        now = time.time()
+        await self._forget(await self._redis.zrangebyscore(self._expiry_key, "-inf", now))
+        await self._redis.zremrangebyscore(self._expiry_key, "-inf", now)
+
+    async def embeddings(self, partition: str) -> tuple[list[str], np.ndarray]:
+        """Return the keys and embeddings of a partition, dropping expired entries."""
+        await self._prune()
+        stored = await self._redis.hgetall(self._embeddings_key(partition))
+        if not stored:
+            return [], np.empty((0, 0), dtype=np.float32)
+        keys = [key.decode() for key in stored]
+        matrix = np.frombuffer(b"".join(stored.values()), dtype=np.float32).reshape(len(keys), -1)
+        return keys, matrix
+
+    async def response(self, partition: str, key: str) -> dict | None:
+        """Return the response of an entry, or ``None`` if it is gone."""
+        response = await self._redis.get(self._entry_key(partition, key))
+        if response is None:
+            await self._forget([f"{partition}:{key}"])
+            return None
+        return json.loads(response)
+
+    async def put(self, partition: str, key: str, entry: CacheEntry) -> None:
+        """Store an entry, evicting the least recently used ones if full."""
+        member = f"{partition}:{key}"
+        pipeline = self._redis.pipeline()
+        pipeline.hset(self._embeddings_key(partition), key, entry.embedding.astype(np.float32).tobytes())
+        pipeline.set(
+            self._entry_key(partition, key),
+            json.dumps(entry.response, ensure_ascii=False),
+            ex=self.ttl,
+        )
+        pipeline.zadd(self._lru_key, {member: time.time()})
+        pipeline.zadd(self._expiry_key, {member: entry.created_at + self.ttl})
+        await pipeline.execute()
+
+        await self._prune()
+        overflow = await self._redis.zcard(self._lru_key) - self.max_entries
+        if overflow > 0:
+            await self._forget([member for member, _ in await self._redis.zpopmin(self._lru_key, overflow)])
+
+    async def touch(self, partition: str, key: str) -> None:
+        """Mark an entry as recently used."""
+        await self._redis.zadd(self._lru_key, {f"{partition}:{key}": time.time()}, xx=True)
+
+    async def size(self) -> int:
+        """Return the number of live entries."""
+        await self._prune()
+        return int(await self._redis.zcard(self._lru_key))
+
+
+class SemanticCache:
+    """Cache of query responses looked up by query-embedding similarity.
+
+    A cached response is reused when a new query's embedding has a cosine
+    similarity of at least ``threshold`` with the cached query, and both
+    requests share the same ``top_k``, metadata filter, tool mode,
+    retrieval mode and reranking.
+    """
+
+    def __init__(self, backend: CacheBackend, threshold: float) -> None:
+        self.backend = backend
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _partition(
+        top_k: int,
+        metadata_filter: dict | None,
+        using_tools: bool,
+        retrieval_mode: str,
+        rerank: bool,
+    ) -> str:
+        """Hash the request parameters a cached response depends on."""
+        key = json.dumps(
+            {
+                "top_k": top_k,
+                "metadata_filter": metadata_filter or {},
+                "using_tools": using_tools,
+                "retrieval_mode": retrieval_mode,
+                "rerank": rerank,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha1(key.encode(), usedforsecurity=False).hexdigest()
+
+    @staticmethod
+    def _normalize(embedding: list[float] | np.ndarray) -> np.ndarray:
+        """Return the embedding as a unit-length float32 vector."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def lookup(
+        self,
+        embedding: list[float] | np.ndarray,
+        top_k: int,
+        metadata_filter: dict | None,
+        using_tools: bool,
+        retrieval_mode: str = "dense",
+        rerank: bool = False,
+    ) -> QueryResponse | None:
+        """Return the cached response of the most similar query, if any."""
+        partition = self._partition(top_k, metadata_filter, using_tools, retrieval_mode, rerank)
+        keys, matrix = await self.backend.embeddings(partition)
+        if keys:
+            similarities = matrix @ self._normalize(embedding)
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                # Only the response of the hit is fetched
+                response = await self.backend.response(partition, keys[best])
+                if response is not None:
+                    await self.backend.touch(partition, keys[best])
+                    self.hits += 1
+                    logger.info(f"Semantic cache hit (similarity={similarities[best]:.4f})")
+                    return QueryResponse(**response)
+        self.misses += 1
+        return None
+
+    async def store(
+        self,
+        embedding: list[float] | np.ndarray,
+        top_k: int,
+        metadata_filter: dict | None,
+        using_tools: bool,
+        response: QueryResponse,
+        retrieval_mode: str = "dense",
+        rerank: bool = False,
+    ) -> None:
+        """Cache a response under the embedding of its query."""
+        await self.backend.put(
+            self._partition(top_k, metadata_filter, using_tools, retrieval_mode, rerank),
+            uuid.uuid4().hex,
+            CacheEntry(
+                embedding=self._normalize(embedding),
+                response=response.model_dump(),
+                created_at=time.time(),
+            ),
+        )
+
+    async def stats(self) -> dict:
+        """Return hit/miss counters and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "threshold": self.threshold,
+            "size": await self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_semantic_cache() -> SemanticCache | None:
+    """Create the semantic cache configured by the environment."""
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    if SEMANTIC_CACHE_BACKEND == "redis":
+        backend = RedisCacheBackend(
+            SEMANTIC_CACHE_REDIS_URL,
+            max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+            ttl=SEMANTIC_CACHE_TTL,
+        )
+    else:
+        backend = InMemoryCacheBackend(
+            max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+            ttl=SEMANTIC_CACHE_TTL,
+        )
+    logger.info(
+        f"Semantic cache enabled with {backend.name} backend "
+        f"(threshold={SEMANTIC_CACHE_THRESHOLD})",
+    )
+    return SemanticCache(backend, threshold=SEMANTIC_CACHE_THRESHOLD)
+
+
+semantic_cache = create_semantic_cache()
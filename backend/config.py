@@ -1,6 +1,6 @@
 import os
+from functools import cache
 
-import torch
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,17 +19,127 @@ QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", None)
 COLLECTION_NAME = os.getenv("QDRANT_COLLECTION_NAME", "buddhism_religion")
 
+# Qdrant connection pool configuration
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", "10"))
+QDRANT_POOL_MAX_CONNECTIONS = int(os.getenv("QDRANT_POOL_MAX_CONNECTIONS", "20"))
+QDRANT_POOL_MAX_KEEPALIVE = int(os.getenv("QDRANT_POOL_MAX_KEEPALIVE", "10"))
+QDRANT_POOL_KEEPALIVE_EXPIRY = float(
+    os.getenv("QDRANT_POOL_KEEPALIVE_EXPIRY", "30"),
+)
+# Create the keyword payload indexes of filterable fields missing at startup,
+# otherwise they are only reported
+QDRANT_CREATE_MISSING_INDEXES = (
+    os.getenv("QDRANT_CREATE_MISSING_INDEXES", "true").lower() == "true"
+)
+
 # Embedding model configuration
 EMBEDDING_MODEL_NAME = os.getenv(
     "EMBEDDING_MODEL_NAME",
     "intfloat/multilingual-e5-base",
 )
 
-DEVICE = (
-    "cuda"
-    if torch.cuda.is_available()
-    else "mps"
-    if torch.backends.mps.is_available()
-    else "cpu"
+# Vector size the Qdrant collection must have for the embedding model
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "768"))
+
+# Encoder runtime: "torch" runs the sentence-transformers model as is, "onnx"
+# exports it once to an int8 dynamically quantized ONNX model (stored under
+# EMBEDDING_ONNX_DIR) and runs it on CPU with ONNX Runtime
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", "models/onnx")
+# Quantization preset matching the CPU: arm64, avx2, avx512 or avx512_vnni
+EMBEDDING_ONNX_QUANTIZATION = os.getenv("EMBEDDING_ONNX_QUANTIZATION", "avx2")
+# ONNX Runtime intra-op threads, 0 lets ONNX Runtime use every physical core
+EMBEDDING_ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))
+
+# Number of threads encoding queries off the event loop
+EMBEDDING_EXECUTOR_WORKERS = int(os.getenv("EMBEDDING_EXECUTOR_WORKERS", "2"))
+# Number of query embeddings kept in the exact-match LRU cache
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1024"))
+# Concurrent query embeddings are grouped into batches of at most
+# EMBEDDING_BATCH_SIZE, waiting up to EMBEDDING_BATCH_WAIT_MS for a batch to fill
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+
+# Hybrid retrieval: a BM25 index over windows of LEXICAL_WINDOW_SIZE STC
+# sentences from LEXICAL_INDEX_PATH, fused with the dense results by
+# reciprocal rank fusion. Each retriever contributes HYBRID_CANDIDATES results.
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "jsonl/cleaned")
+LEXICAL_WINDOW_SIZE = int(os.getenv("LEXICAL_WINDOW_SIZE", "5"))
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+# The index is built on the first hybrid query unless LEXICAL_WARMUP builds it
+# during warm-up
+LEXICAL_WARMUP = os.getenv("LEXICAL_WARMUP", "false").lower() == "true"
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Optional cross-encoder reranking: RERANK_CANDIDATES passages are retrieved
+# and rescored in batches of RERANK_BATCH_SIZE. Scoring stops once
+# RERANK_BUDGET_MS is spent. RERANK_ENABLED sets the default of
+# QueryRequest.rerank and loads the reranker during warm-up.
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANKER_MODEL_NAME = os.getenv(
+    "RERANKER_MODEL_NAME",
+    "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1",
+)
+RERANKER_DEVICE = os.getenv("RERANKER_DEVICE", "cpu")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "50"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "300"))
+
+# Semantic answer cache configuration. Opt-in: e5 similarities are bunched
+# close together, so at a loose threshold two different questions on the same
+# topic can share an answer. Tune SEMANTIC_CACHE_THRESHOLD on paraphrase pairs
+# and distinct questions from your own traffic before enabling it.
+SEMANTIC_CACHE_ENABLED = (
+    os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+)
+SEMANTIC_CACHE_BACKEND = os.getenv("SEMANTIC_CACHE_BACKEND", "memory")
+SEMANTIC_CACHE_REDIS_URL = os.getenv(
+    "SEMANTIC_CACHE_REDIS_URL",
+    "redis://localhost:6379/0",
 )
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+
+# How tool-mode answers run their tools: "local" calls the retrieval
+# functions in-process, "mcp" goes through the MCP server
+TOOL_EXECUTION_MODE = os.getenv("TOOL_EXECUTION_MODE", "local").lower()
+
+# Tool calls of one assistant turn run concurrently, at most
+# TOOL_CONCURRENCY at a time, each bounded by TOOL_TIMEOUT seconds
+TOOL_CONCURRENCY = int(os.getenv("TOOL_CONCURRENCY", "4"))
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "30"))
+
+# Persistent MCP sessions used by tool-mode answers. Every session runs its
+# own tools server, which loads its own copy of the encoder at startup
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "2"))
+MCP_HEALTHCHECK_INTERVAL = float(os.getenv("MCP_HEALTHCHECK_INTERVAL", "30"))
+
 PORT = int(os.getenv("PORT", 8000))
+
+
+@cache
+def get_device() -> str:
+    """Detect the device for torch models.
+
+    torch is imported here, on first use, so that importing the config does
+    not load it.
+    """
+    import torch
+
+    return (
+        "cuda"
+        if torch.cuda.is_available()
+        else "mps"
+        if torch.backends.mps.is_available()
+        else "cpu"
+    )
+
+
+def __getattr__(name: str) -> str:
+    """Resolve ``DEVICE`` lazily for code reading it as a module attribute."""
+    if name == "DEVICE":
+        return get_device()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
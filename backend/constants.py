@@ -32,3 +32,26 @@ class Volume(Enum):
     AN_SI_TOAN_THU_QUYEN_IV = (
         "An Sĩ Toàn Thư - Phần I Âm Chất Văn Quảng Nghĩa - Quyển IV"
     )
+
+
+def split_page_id(page_id: str) -> tuple[str, str, str] | None:
+    """Split a "<book>.<chapter>.<page>" page ID, e.g. "RBI_002.001.017".
+
+    Both retrievers cite passages with these parts, so they must agree.
+    Returns ``None`` for a malformed ID.
+    """
+    parts = page_id.split(".")
+    return (parts[0], parts[1], parts[2]) if len(parts) == 3 else None
+
+
+# NER entity types, flattened into "entities_<TYPE>" payload keys on upload
+ENTITY_TYPES = ["PER", "LOC", "ORG", "TITLE", "TME", "NUM"]
+
+# Payload fields used in search filters, each gets a keyword payload index
+KEYWORD_INDEX_FIELDS = [
+    "title",
+    "volume",
+    "book_id",
+    "chapter_id",
+    *(f"entities_{entity_type}" for entity_type in ENTITY_TYPES),
+]
@@ -0,0 +1,226 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+from backend.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_ONNX_DIR,
+    EMBEDDING_ONNX_QUANTIZATION,
+    EMBEDDING_ONNX_THREADS,
+    get_device,
+)
+
+# sentence_transformers pulls in torch and transformers, which take seconds to
+# import, so it is only imported when a model is loaded
+if TYPE_CHECKING:
+    import onnxruntime
+    from sentence_transformers import SentenceTransformer
+
+
+def _onnx_session_options() -> "onnxruntime.SessionOptions":
+    """Return ONNX Runtime session options with the configured thread count."""
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = EMBEDDING_ONNX_THREADS
+    options.inter_op_num_threads = 1
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return options
+
+
+def export_onnx_model(
+    model_name: str,
+    export_dir: str = EMBEDDING_ONNX_DIR,
+    quantization: str = EMBEDDING_ONNX_QUANTIZATION,
+) -> tuple[Path, str]:
+    """Export the int8 quantized ONNX model, unless it was already exported.
+
+    Returns:
+        The directory of the export and the ONNX file name inside it.
+
+    """
+    model_dir = Path(export_dir) / model_name.replace("/", "__")
+    # The export names the file after the weights dtype of the preset
+    # (e.g. "quint8" for avx2) unless it is given an explicit suffix
+    file_suffix = f"qint8_{quantization}"
+    file_name = f"onnx/model_{file_suffix}.onnx"
+    if (model_dir / file_name).exists():
+        return model_dir, file_name
+
+    from sentence_transformers import SentenceTransformer
+
+    try:
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+    except ImportError as exc:
+        raise ImportError(
+            "EMBEDDING_BACKEND=onnx needs sentence-transformers[onnx]",
+        ) from exc
+
+    logger.info(f"Exporting {model_name} to a quantized ONNX model in {model_dir}")
+    model = SentenceTransformer(model_name, backend="onnx", device="cpu")
+    model.save_pretrained(str(model_dir))
+    export_dynamic_quantized_onnx_model(model, quantization, str(model_dir), file_suffix=file_suffix)
+    return model_dir, file_name
+
+
+def load_onnx_model(
+    model_name: str,
+    export_dir: str = EMBEDDING_ONNX_DIR,
+    quantization: str = EMBEDDING_ONNX_QUANTIZATION,
+) -> tuple["SentenceTransformer", Path]:
+    """Load the int8 quantized ONNX export of a model, exporting it on first use.
+
+    Returns:
+        The model running on ONNX Runtime and the path of its ONNX file.
+
+    """
+    from sentence_transformers import SentenceTransformer
+
+    model_dir, file_name = export_onnx_model(model_name, export_dir, quantization)
+    model = SentenceTransformer(
+        str(model_dir),
+        backend="onnx",
+        device="cpu",
+        model_kwargs={
+            "file_name": file_name,
+            "provider": "CPUExecutionProvider",
+            "session_options": _onnx_session_options(),
+        },
+    )
+    return model, model_dir / file_name
+
+
+def _current_rss_bytes() -> int | None:
+    """Return the resident set size of the current process, if available."""
+    statm = Path("/proc/self/statm")
+    if not statm.exists():
+        return None
+    resident_pages = int(statm.read_text().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+@dataclass
+class LoadedModel:
+    """A loaded embedding model together with its load statistics."""
+
+    model: "SentenceTransformer"
+    name: str
+    backend: str
+    device: str
+    load_seconds: float
+    parameter_bytes: int
+    rss_delta_bytes: int | None
+
+
+class ModelRegistry:
+    """Process-wide registry that loads each embedding model only once."""
+
+    def __init__(self) -> None:
+        self._models: dict[tuple[str, str], LoadedModel] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        device: str | None = None,
+        backend: str = EMBEDDING_BACKEND,
+    ) -> "SentenceTransformer":
+        """Return the model, loading it on first use.
+
+        The device defaults to the detected one. With the "onnx" backend the
+        model always runs on CPU.
+        """
+        key = self._key(model_name, device, backend)
+        loaded = self._models.get(key)
+        if loaded is None:
+            with self._lock:
+                loaded = self._models.get(key)
+                if loaded is None:
+                    loaded = self._load(*key)
+                    self._models[key] = loaded
+        return loaded.model
+
+    def is_loaded(
+        self,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        device: str | None = None,
+        backend: str = EMBEDDING_BACKEND,
+    ) -> bool:
+        """Check whether the model has already been loaded."""
+        return self._key(model_name, device, backend) in self._models
+
+    @staticmethod
+    def _key(model_name: str, device: str | None, backend: str) -> tuple[str, str, str]:
+        """Return the registry key of a model."""
+        if backend == "onnx":
+            device = "cpu"
+        return (model_name, device or get_device(), backend)
+
+    def status(self) -> list[dict]:
+        """Return load time and memory footprint of every loaded model."""
+        return [
+            {
+                "name": loaded.name,
+                "backend": loaded.backend,
+                "device": loaded.device,
+                "load_seconds": loaded.load_seconds,
+                "parameter_bytes": loaded.parameter_bytes,
+                "rss_delta_bytes": loaded.rss_delta_bytes,
+            }
+            for loaded in self._models.values()
+        ]
+
+    def _load(self, model_name: str, device: str, backend: str) -> LoadedModel:
+        """Load the model and measure how long and how much memory it took."""
+        logger.info(f"Loading embedding model: {model_name} on device: {device} ({backend})")
+        rss_before = _current_rss_bytes()
+        start = time.perf_counter()
+        if backend == "onnx":
+            model, onnx_path = load_onnx_model(model_name)
+            # The quantized weights live in the ONNX file, not in torch parameters
+            parameter_bytes = onnx_path.stat().st_size
+        else:
+            if backend != "torch":
+                logger.warning(f"Unknown embedding backend '{backend}', using torch")
+            from sentence_transformers import SentenceTransformer
+
+            model = SentenceTransformer(model_name, device=device)
+            parameter_bytes = sum(
+                parameter.numel() * parameter.element_size()
+                for parameter in model.parameters()
+            )
+        load_seconds = time.perf_counter() - start
+        rss_after = _current_rss_bytes()
+
+        rss_delta_bytes = (
+            rss_after - rss_before
+            if rss_before is not None and rss_after is not None
+            else None
+        )
+        logger.info(
+            f"Loaded embedding model {model_name} in {load_seconds:.2f}s "
+            f"({parameter_bytes / 1024**2:.1f} MiB of parameters)",
+        )
+        return LoadedModel(
+            model=model,
+            name=model_name,
+            backend=backend,
+            device=device,
+            load_seconds=load_seconds,
+            parameter_bytes=parameter_bytes,
+            rss_delta_bytes=rss_delta_bytes,
+        )
+
+
+model_registry = ModelRegistry()
+
+
+def get_embedding_model() -> "SentenceTransformer":
+    """Return the shared embedding model used for queries."""
+    return model_registry.get()
@@ -0,0 +1,96 @@
+from dataclasses import asdict, dataclass
+
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+from backend.config import COLLECTION_NAME, EMBEDDING_DIM
+from backend.encoder import ModelRegistry, model_registry
+from backend.qdrant_pool import QdrantPool, qdrant_pool
+from backend.warmup import Warmup, warmup
+
+
+@dataclass
+class ReadinessCheck:
+    """Result of one readiness check."""
+
+    name: str
+    ok: bool
+    detail: str = ""
+
+
+class ReadinessProbe:
+    """Check that the backend can serve queries without running one.
+
+    The probe only reads state and asks Qdrant for collection metadata, so
+    it costs neither an embedding nor an LLM call.
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry = model_registry,
+        pool: QdrantPool = qdrant_pool,
+        startup: Warmup = warmup,
+        collection_name: str = COLLECTION_NAME,
+        vector_size: int = EMBEDDING_DIM,
+    ) -> None:
+        self.registry = registry
+        self.pool = pool
+        self.startup = startup
+        self.collection_name = collection_name
+        self.vector_size = vector_size
+
+    def _check_warmup(self) -> ReadinessCheck:
+        """Check that the startup warm-up has finished."""
+        if self.startup.ready:
+            return ReadinessCheck("warmup", ok=True, detail=f"{self.startup.seconds:.2f}s")
+        pending = [stage.name for stage in self.startup.stages.values() if stage.error]
+        detail = f"retrying {', '.join(pending)}" if pending else "in progress"
+        return ReadinessCheck("warmup", ok=False, detail=detail)
+
+    def _check_encoder(self) -> ReadinessCheck:
+        """Check that the query encoder has been loaded."""
+        if self.registry.is_loaded():
+            return ReadinessCheck("encoder", ok=True)
+        return ReadinessCheck("encoder", ok=False, detail="embedding model not loaded yet")
+
+    async def _check_qdrant(self) -> list[ReadinessCheck]:
+        """Check that Qdrant responds and the collection has the expected vector size."""
+        try:
+            info = await self.pool.async_client.get_collection(self.collection_name)
+        except UnexpectedResponse as e:
+            if e.status_code == 404:
+                return [
+                    ReadinessCheck("qdrant", ok=True),
+                    ReadinessCheck(
+                        "collection",
+                        ok=False,
+                        detail=f"collection '{self.collection_name}' does not exist",
+                    ),
+                ]
+            return [ReadinessCheck("qdrant", ok=False, detail=str(e))]
+        except Exception as e:
+            return [ReadinessCheck("qdrant", ok=False, detail=str(e))]
+
+        vectors = info.config.params.vectors
+        # Collections created by the uploader use a single unnamed vector
+        size = vectors.size if hasattr(vectors, "size") else None
+        if size != self.vector_size:
+            return [
+                ReadinessCheck("qdrant", ok=True),
+                ReadinessCheck(
+                    "collection",
+                    ok=False,
+                    detail=f"vector size is {size}, expected {self.vector_size}",
+                ),
+            ]
+        return [
+            ReadinessCheck("qdrant", ok=True),
+            ReadinessCheck("collection", ok=True, detail=f"{info.points_count or 0} points"),
+        ]
+
+    async def check(self) -> tuple[bool, list[dict]]:
+        """Run every check and return whether all of them passed."""
+        checks = [self._check_warmup(), self._check_encoder(), *await self._check_qdrant()]
+        return all(check.ok for check in checks), [asdict(check) for check in checks]
+
+
+readiness_probe = ReadinessProbe()
@@ -0,0 +1,186 @@
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from itertools import pairwise
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from backend.config import LEXICAL_INDEX_PATH, LEXICAL_WINDOW_SIZE
+from backend.constants import ENTITY_TYPES, split_page_id
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase syllables and syllable bigrams.
+
+    Vietnamese writes one syllable per word, so the bigrams let multi-syllable
+    names and Hán-Việt terms such as "đế quân" match as a unit.
+    """
+    syllables = TOKEN_PATTERN.findall(unicodedata.normalize("NFC", text).lower())
+    bigrams = [f"{first}_{second}" for first, second in pairwise(syllables)]
+    return syllables + bigrams
+
+
+def iter_sentence_windows(sentences: Iterable[dict], window_size: int) -> Iterator[list[dict]]:
+    """Group consecutive STC sentences of the same page into windows.
+
+    The embedder builds its sentence passages with the same windows, so a
+    passage found by both retrievers has the same text in both rankings.
+    """
+    window: list[dict] = []
+    for sentence in sentences:
+        if window and (
+            len(window) == window_size
+            or sentence["meta"]["page_id"] != window[0]["meta"]["page_id"]
+        ):
+            yield window
+            window = []
+        window.append(sentence)
+    if window:
+        yield window
+
+
+class LexicalIndex:
+    """In-process BM25 index over windows of STC sentences.
+
+    Consecutive sentences of the same page are grouped into windows of
+    ``window_size`` sentences; a window is the unit that is scored and
+    returned, so lexical hits have about the size of a short passage.
+    """
+
+    def __init__(
+        self,
+        passages: list[dict],
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> None:
+        self.passages = passages
+        self._vocabulary: dict[str, int] = {}
+        term_ids, doc_ids, counts = [], [], []
+        lengths = np.zeros(len(passages), dtype=np.float32)
+        for doc_id, passage in enumerate(passages):
+            terms = Counter(tokenize(passage["text"]))
+            lengths[doc_id] = sum(terms.values())
+            for term, count in terms.items():
+                term_ids.append(self._vocabulary.setdefault(term, len(self._vocabulary)))
+                doc_ids.append(doc_id)
+                counts.append(count)
+
+        # Postings sorted by term id; the postings of a term lie between its
+        # offset and the offset of the next term
+        term_ids = np.array(term_ids, dtype=np.int32)
+        order = np.argsort(term_ids, kind="stable")
+        self._doc_ids = np.array(doc_ids, dtype=np.int32)[order]
+        counts = np.array(counts, dtype=np.float32)[order]
+        document_frequency = np.bincount(term_ids, minlength=len(self._vocabulary))
+        self._offsets = np.concatenate([[0], np.cumsum(document_frequency)])
+
+        # Store the full BM25 weight of every posting, so a query only sums them
+        idf = np.log(1 + (len(passages) - document_frequency + 0.5) / (document_frequency + 0.5))
+        average_length = float(lengths.mean()) if len(lengths) else 1.0
+        norm = k1 * (1 - b + b * lengths[self._doc_ids] / average_length)
+        posting_idf = np.repeat(idf, document_frequency).astype(np.float32)
+        self._weights = posting_idf * counts * (k1 + 1) / (counts + norm)
+
+    @classmethod
+    def from_jsonl(cls, directory: str | Path, window_size: int = LEXICAL_WINDOW_SIZE) -> "LexicalIndex":
+        """Build the index from the cleaned STC sentence files."""
+        passages = []
+        for path in sorted(Path(directory).glob("*.jsonl")):
+            with path.open(encoding="utf-8") as f:
+                sentences = (json.loads(line) for line in f if line.strip())
+                passages.extend(cls._to_passage(window) for window in iter_sentence_windows(sentences, window_size))
+        return cls(passages)
+
+    @staticmethod
+    def _to_passage(sentences: list[dict]) -> dict:
+        """Merge consecutive sentences of one page into a passage."""
+        meta = sentences[0]["meta"]
+        # Same citation fields as the payload of the dense points
+        book_id, chapter_id, page = split_page_id(meta.get("page_id") or "") or ("", "", "")
+        passage = {
+            "text": "\n".join(sentence["text"] for sentence in sentences),
+            "book_id": book_id,
+            "chapter_id": chapter_id,
+            "page": page,
+            "title": meta.get("title") or "",
+            "volume": meta.get("volume") or "",
+        }
+        # Flattened like the "entities_<TYPE>" payload keys, so entity filters match
+        for entity_type in ENTITY_TYPES:
+            texts = [text for sentence in sentences for text in sentence.get("entities", {}).get(entity_type, [])]
+            if texts:
+                passage[f"entities_{entity_type}"] = list(dict.fromkeys(texts))
+        return passage
+
+    @staticmethod
+    def _matches(passage: dict, metadata_filter: dict) -> bool:
+        """Check a passage against the filter, matching list fields by membership."""
+        for key, value in metadata_filter.items():
+            field = passage.get(key)
+            if field != value and not (isinstance(field, list) and value in field):
+                return False
+        return True
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        metadata_filter: dict | None = None,
+    ) -> list[dict]:
+        """Return the ``top_k`` passages with the highest BM25 score."""
+        scores = np.zeros(len(self.passages), dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self._vocabulary.get(term)
+            if term_id is not None:
+                start, end = self._offsets[term_id], self._offsets[term_id + 1]
+                scores[self._doc_ids[start:end]] += self._weights[start:end]
+
+        if metadata_filter:
+            for doc_id in np.flatnonzero(scores):
+                if not self._matches(self.passages[doc_id], metadata_filter):
+                    scores[doc_id] = 0.0
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k)[:top_k]]
+        ranked = candidates[np.argsort(-scores[candidates])]
+        return [
+            {
+                "score": float(scores[doc_id]),
+                "text": self.passages[doc_id]["text"],
+                "book_id": self.passages[doc_id]["book_id"],
+                "chapter_id": self.passages[doc_id]["chapter_id"],
+                "page": self.passages[doc_id]["page"],
+            }
+            for doc_id in ranked
+        ]
+
+
+_lexical_index: LexicalIndex | None = None
+_lexical_index_lock = threading.Lock()
+
+
+def get_lexical_index() -> LexicalIndex:
+    """Return the shared lexical index, building it on first use."""
+    global _lexical_index
+    if _lexical_index is None:
+        with _lexical_index_lock:
+            if _lexical_index is None:
+                start = time.perf_counter()
+                index = LexicalIndex.from_jsonl(LEXICAL_INDEX_PATH)
+                if not index.passages:
+                    logger.warning(f"No STC sentences found in {LEXICAL_INDEX_PATH}, lexical search is empty")
+                logger.info(
+                    f"Built lexical index over {len(index.passages)} passages "
+                    f"in {time.perf_counter() - start:.2f}s",
+                )
+                _lexical_index = index
+    return _lexical_index
@@ -1,2 +1,2 @@
-from .llm import generate_answer
+from .llm import agenerate_answer, astream_answer, generate_answer
 from .llm_with_tools import generate_answer_with_tools
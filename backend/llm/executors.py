@@ -0,0 +1,208 @@
+import asyncio
+import inspect
+import json
+import operator
+import types
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from enum import Enum
+from functools import reduce
+from typing import Any, Literal, Union, get_args, get_origin
+
+import json_repair
+from loguru import logger
+from openai.types.chat import ChatCompletionMessageToolCall, ChatCompletionToolParam
+from pydantic import BaseModel, create_model
+
+from backend.config import TOOL_EXECUTION_MODE
+from backend.llm.mcp_pool import MCPSessionPool, mcp_pool
+from backend.llm.retrieval_tools import TOOL_FUNCTIONS
+from backend.llm.utils import (
+    convert_tools_to_openai_format,
+    handle_tool_call,
+    run_tool_calls,
+    sanitize_tool_name,
+)
+from backend.rag import aembed_queries
+
+
+class ToolExecutor(ABC):
+    """Run the tool calls requested by the LLM."""
+
+    mode: str
+
+    async def start(self) -> None:  # noqa: B027
+        """Prepare the executor before the first call."""
+
+    async def close(self) -> None:  # noqa: B027
+        """Release the resources held by the executor."""
+
+    @property
+    @abstractmethod
+    def openai_tools(self) -> list[ChatCompletionToolParam]:
+        """Return the tool definitions sent to the LLM."""
+
+    @abstractmethod
+    async def call(self, tool_name: str, tool_args: dict | str) -> str:
+        """Run one tool and return its result as message content."""
+
+    async def prefetch(self, tool_calls: list[ChatCompletionMessageToolCall]) -> None:  # noqa: B027
+        """Do work shared by the tool calls of one turn before they run."""
+
+    async def run(
+        self,
+        tool_calls: list[ChatCompletionMessageToolCall],
+    ) -> list[dict]:
+        """Run the tool calls of one assistant turn concurrently.
+
+        The turn costs about as much as its slowest call. The tool messages
+        keep the order of ``tool_calls``.
+        """
+        await self.prefetch(tool_calls)
+        return await run_tool_calls(tool_calls, self.call)
+
+
+def _plain_literals(annotation: Any) -> Any:
+    """Replace Enum members inside Literal annotations by their values.
+
+    The LLM sends the values as plain strings, which a ``Literal`` of Enum
+    members would reject.
+    """
+    origin = get_origin(annotation)
+    if origin is Literal:
+        return Literal[
+            tuple(
+                arg.value if isinstance(arg, Enum) else arg
+                for arg in get_args(annotation)
+            )
+        ]
+    if origin in (Union, types.UnionType):
+        return reduce(operator.or_, (_plain_literals(arg) for arg in get_args(annotation)))
+    return annotation
+
+
+def _arguments_model(function: Callable) -> type[BaseModel]:
+    """Build a pydantic model validating the arguments of a tool function."""
+    fields = {
+        name: (
+            _plain_literals(parameter.annotation),
+            ... if parameter.default is inspect.Parameter.empty else parameter.default,
+        )
+        for name, parameter in inspect.signature(function).parameters.items()
+    }
+    return create_model(f"{function.__name__}_arguments", **fields)
+
+
+class LocalToolExecutor(ToolExecutor):
+    """Call the retrieval functions directly, without MCP or a subprocess."""
+
+    mode = "local"
+
+    def __init__(self, functions: list[Callable] = TOOL_FUNCTIONS) -> None:
+        self._functions = {
+            sanitize_tool_name(function.__name__): function for function in functions
+        }
+        self._arguments = {
+            name: _arguments_model(function)
+            for name, function in self._functions.items()
+        }
+        self._openai_tools = [
+            {
+                "type": "function",
+                "function": {
+                    "name": name,
+                    "description": inspect.getdoc(function),
+                    "parameters": self._arguments[name].model_json_schema(),
+                },
+            }
+            for name, function in self._functions.items()
+        ]
+
+    @property
+    def openai_tools(self) -> list[ChatCompletionToolParam]:
+        """Return the tool definitions sent to the LLM."""
+        return self._openai_tools
+
+    @staticmethod
+    def _parse_arguments(tool_name: str, tool_args: dict | str) -> dict:
+        """Parse the JSON arguments sent by the LLM."""
+        if not isinstance(tool_args, str):
+            return tool_args
+        try:
+            return json_repair.loads(tool_args)
+        except json.JSONDecodeError as exc:
+            raise ValueError(
+                f"Invalid JSON: {tool_args} from {tool_name}",
+            ) from exc
+
+    async def prefetch(self, tool_calls: list[ChatCompletionMessageToolCall]) -> None:
+        """Embed the queries of every tool call in one encoder batch.
+
+        The embeddings land in the query embedding cache, so the retrievals
+        running concurrently afterwards only search Qdrant.
+        """
+        queries = []
+        for tool_call in tool_calls:
+            try:
+                tool_args = self._parse_arguments(tool_call.function.name, tool_call.function.arguments)
+            except ValueError:
+                continue
+            if isinstance(tool_args, dict) and isinstance(tool_args.get("query"), str):
+                queries.append(tool_args["query"])
+        if len(queries) > 1:
+            await aembed_queries(queries)
+
+    async def call(self, tool_name: str, tool_args: dict | str) -> str:
+        """Validate the arguments and run the function off the event loop."""
+        function = self._functions.get(tool_name)
+        if function is None:
+            raise ValueError(f"Tool {tool_name} not found")
+        tool_args = self._parse_arguments(tool_name, tool_args)
+
+        arguments = self._arguments[tool_name].model_validate(tool_args)
+        result = await asyncio.to_thread(function, **dict(arguments))
+        return json.dumps(result, ensure_ascii=False)
+
+
+class MCPToolExecutor(ToolExecutor):
+    """Call the tools through the persistent MCP sessions."""
+
+    mode = "mcp"
+
+    def __init__(self, session_pool: MCPSessionPool = mcp_pool) -> None:
+        self.session_pool = session_pool
+
+    async def start(self) -> None:
+        """Open the MCP sessions."""
+        await self.session_pool.start()
+
+    async def close(self) -> None:
+        """Close the MCP sessions."""
+        await self.session_pool.close()
+
+    @property
+    def openai_tools(self) -> list[ChatCompletionToolParam]:
+        """Return the tool definitions advertised by the MCP server."""
+        return convert_tools_to_openai_format(self.session_pool.tools)
+
+    async def call(self, tool_name: str, tool_args: dict | str) -> str:
+        """Run the tool on a borrowed MCP session."""
+        async with self.session_pool.session() as client:
+            return await handle_tool_call(
+                tool_name,
+                tool_args,
+                mcp_client=client,
+                available_tools=self.session_pool.tools,
+            )
+
+
+def create_tool_executor(mode: str = TOOL_EXECUTION_MODE) -> ToolExecutor:
+    """Create the tool executor selected by ``TOOL_EXECUTION_MODE``."""
+    if mode == "mcp":
+        return MCPToolExecutor()
+    if mode != "local":
+        logger.warning(f"Unknown tool execution mode '{mode}', using local")
+    return LocalToolExecutor()
+
+
+tool_executor = create_tool_executor()
@@ -1,5 +1,9 @@
+from collections.abc import AsyncIterator
+
 import openai
 from loguru import logger
+from openai import Stream
+from openai.types.chat import ChatCompletionChunk
 
 from backend.config import OPENAI_API_BASE, OPENAI_API_KEY, OPENAI_MODEL_NAME
 
@@ -7,6 +11,10 @@ client = openai.OpenAI(
     base_url=OPENAI_API_BASE,
     api_key=OPENAI_API_KEY,
 )
+async_client = openai.AsyncOpenAI(
+    base_url=OPENAI_API_BASE,
+    api_key=OPENAI_API_KEY,
+)
 
 SYSTEM_PROMPT = """
 Bạn là một chuyên gia trong lĩnh vực tôn giáo phương Đông.
@@ -29,24 +37,33 @@ Hướng dẫn: hãy dựa trên các nội dung liên quan để trả lời c
 """.strip()
 
 
-def generate_answer(
-    question: str,
-    relevant_texts: list[dict],
-    model_name: str = OPENAI_MODEL_NAME,
-    stream: bool = True,
-) -> str:
-    """Generate answer using LLM."""
+def build_prompt(question: str, relevant_texts: list[dict]) -> str:
+    """Build the user prompt from the question and the relevant texts."""
     relevant_texts_str = "\n"
     for text in relevant_texts:
         relevant_texts_str += f"- {text['text']}\n"
 
-    prompt = USER_PROMPT_TEMPLATE.format(
+    return USER_PROMPT_TEMPLATE.format(
         question=question,
         relevant_texts=relevant_texts_str,
     )
+
+
+def generate_answer(
+    question: str,
+    relevant_texts: list[dict],
+    model_name: str = OPENAI_MODEL_NAME,
+    stream: bool = False,
+) -> str | Stream[ChatCompletionChunk]:
+    """Generate answer using LLM.
+
+    With ``stream`` set, the raw completion stream is returned instead of the
+    answer text.
+    """
+    prompt = build_prompt(question, relevant_texts)
     logger.info(f"Calling LLM at {OPENAI_API_BASE} with model {model_name}")
     logger.info(f"Prompt: {prompt}")
-    if stream:
+    if not stream:
         try:
             response = client.chat.completions.create(
                 model=model_name,
@@ -73,6 +90,66 @@ def generate_answer(
     )
 
 
+async def agenerate_answer(
+    question: str,
+    relevant_texts: list[dict],
+    model_name: str = OPENAI_MODEL_NAME,
+) -> str:
+    """Generate answer using LLM without blocking the event loop."""
+    prompt = build_prompt(question, relevant_texts)
+    logger.info(f"Calling LLM at {OPENAI_API_BASE} with model {model_name}")
+    logger.info(f"Prompt: {prompt}")
+    try:
+        response = await async_client.chat.completions.create(
+            model=model_name,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.1,
+        )
+    except Exception as e:
+        logger.error(f"Error generating answer: {e}")
+        return ""
+
+    return response.choices[0].message.content or ""
+
+
+async def astream_answer(
+    question: str,
+    relevant_texts: list[dict],
+    model_name: str = OPENAI_MODEL_NAME,
+) -> AsyncIterator[str]:
+    """Stream the answer token by token as the LLM produces it.
+
+    Closing the generator early (e.g. when the client disconnects) closes the
+    upstream completion stream, which cancels the generation. Errors raised
+    while the stream is read propagate to the caller.
+    """
+    prompt = build_prompt(question, relevant_texts)
+    logger.info(f"Streaming LLM answer from {OPENAI_API_BASE} with model {model_name}")
+    try:
+        stream = await async_client.chat.completions.create(
+            model=model_name,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.1,
+            stream=True,
+        )
+    except Exception as e:
+        logger.error(f"Error generating answer: {e}")
+        return
+
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        await stream.close()
+
+
 if __name__ == "__main__":
     retrieved = [
         "Người làm thiện được phúc, người làm ác chịu báo ứng.",
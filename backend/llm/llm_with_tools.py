@@ -1,11 +1,10 @@
-import os
+import json
 
-import openai
 from dotenv import load_dotenv
 from loguru import logger
 
-from backend.llm.constants import MCP_SERVER_PATH
-from backend.llm.utils import call_and_return_tool_result
+from backend.llm.executors import ToolExecutor, tool_executor
+from backend.llm.llm import async_client
 
 load_dotenv()
 
@@ -23,11 +22,41 @@ Nếu nội dung liên quan không được tìm thấy (là rỗng hoặc khôn
 """
 
 
-async def generate_answer_with_tools(question: str) -> str:
-    """Generate answer with tools."""
-    openai_client = openai.AsyncOpenAI(
-        api_key=os.getenv("OPENAI_API_KEY"),
-    )
+def _retrieved_passages(tool_messages: list[dict]) -> list[dict]:
+    """Collect the passages returned by the retrieval tools.
+
+    Passages retrieved by several calls are kept once, and the result is
+    sorted by decreasing score.
+    """
+    passages = {}
+    for message in tool_messages:
+        try:
+            result = json.loads(message["content"])
+        except (TypeError, json.JSONDecodeError):
+            continue
+        if not isinstance(result, list):
+            continue
+        for passage in result:
+            if not isinstance(passage, dict) or "text" not in passage:
+                continue
+            key = (passage.get("book_id"), passage.get("chapter_id"), passage.get("page"), passage["text"])
+            if key not in passages or passage.get("score", 0) > passages[key].get("score", 0):
+                passages[key] = passage
+    return sorted(passages.values(), key=lambda passage: passage.get("score", 0), reverse=True)
+
+
+async def generate_answer_with_tools(
+    question: str,
+    executor: ToolExecutor = tool_executor,
+) -> tuple[str, list[dict]]:
+    """Generate answer with tools run by the configured tool executor.
+
+    Returns:
+        The answer and the passages the tools retrieved while producing it.
+
+    """
+    await executor.start()
+    openai_tools = executor.openai_tools
     messages = [
         {
             "role": "system",
@@ -38,27 +67,37 @@ async def generate_answer_with_tools(question: str) -> str:
             "content": question,
         },
     ]
-    response = await openai_client.chat.completions.create(
+    response = await async_client.chat.completions.create(
         model="gpt-4o-mini",
         messages=messages,
+        tools=openai_tools,
     )
     assistant_message = response.choices[0].message
+    tool_messages = []
     while assistant_message.tool_calls:
-        results = await call_and_return_tool_result(
-            tools=assistant_message.tool_calls,
-            mcp_server_path=MCP_SERVER_PATH,
+        messages.append(
+            {
+                "role": "assistant",
+                "content": assistant_message.content or "",
+                "tool_calls": [
+                    tool_call.model_dump() for tool_call in assistant_message.tool_calls
+                ],
+            },
         )
+        results = await executor.run(assistant_message.tool_calls)
         messages.extend(results)
-        response = await openai_client.chat.completions.create(
+        tool_messages.extend(results)
+        response = await async_client.chat.completions.create(
             model="gpt-4o-mini",
             messages=messages,
+            tools=openai_tools,
         )
         assistant_message = response.choices[0].message
     logger.info(f"Assistant message: {assistant_message.content}")
-    return assistant_message.content
+    return assistant_message.content, _retrieved_passages(tool_messages)
 
 
 if __name__ == "__main__":
     import asyncio
 
-    asyncio.run(generate_answer_with_tools("Đế Quân dạy điều gì về nhân quả?"))
+    answer, _ = asyncio.run(generate_answer_with_tools("Đế Quân dạy điều gì về nhân quả?"))
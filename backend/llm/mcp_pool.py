@@ -0,0 +1,166 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+from backend.config import MCP_HEALTHCHECK_INTERVAL, MCP_POOL_SIZE
+from backend.llm.constants import MCP_SERVER_PATH
+
+# fastmcp is only needed with TOOL_EXECUTION_MODE=mcp, so it is imported when
+# the first session opens
+if TYPE_CHECKING:
+    from fastmcp import Client
+    from mcp import Tool
+
+
+class MCPSessionPool:
+    """Long-lived MCP client sessions shared by tool-mode requests.
+
+    Every session keeps its tools server subprocess running, so a tool call
+    no longer pays a cold start. The tool list is fetched once and cached.
+    Sessions idle for longer than ``healthcheck_interval`` are probed before
+    reuse and reconnected if the server has gone away.
+    """
+
+    def __init__(
+        self,
+        server_path: str = MCP_SERVER_PATH,
+        size: int = MCP_POOL_SIZE,
+        healthcheck_interval: float = MCP_HEALTHCHECK_INTERVAL,
+    ) -> None:
+        self.server_path = server_path
+        self.size = size
+        self.healthcheck_interval = healthcheck_interval
+        self._idle: asyncio.Queue[Client] | None = None
+        self._last_used: dict[int, float] = {}
+        self._sessions: dict[int, tuple[asyncio.Event, asyncio.Task]] = {}
+        self._tools: list[Tool] | None = None
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def started(self) -> bool:
+        """Whether the sessions have been opened."""
+        return self._idle is not None
+
+    @property
+    def tools(self) -> "list[Tool]":
+        """Return the cached tool list of the MCP server."""
+        if self._tools is None:
+            raise RuntimeError("MCP session pool has not been started")
+        return self._tools
+
+    async def _run_session(
+        self,
+        client: "Client",
+        connected: asyncio.Future,
+        stop: asyncio.Event,
+    ) -> None:
+        """Hold a session open in its own task until asked to stop.
+
+        The MCP client must be entered and exited by the same task, so each
+        session lives in a dedicated task instead of the requests using it.
+        """
+        try:
+            async with client:
+                connected.set_result(None)
+                await stop.wait()
+        except Exception as e:
+            if not connected.done():
+                connected.set_exception(e)
+            else:
+                logger.warning(f"MCP session ended with an error: {e}")
+
+    async def _connect(self) -> "Client":
+        """Open a new session to the MCP server."""
+        from fastmcp import Client
+
+        client = Client(Path(self.server_path))
+        connected = asyncio.get_running_loop().create_future()
+        stop = asyncio.Event()
+        task = asyncio.create_task(self._run_session(client, connected, stop))
+        await connected
+        self._sessions[id(client)] = (stop, task)
+        self._last_used[id(client)] = time.monotonic()
+        return client
+
+    async def _disconnect(self, client: "Client") -> None:
+        """Close a session and wait for its server to exit."""
+        self._last_used.pop(id(client), None)
+        session = self._sessions.pop(id(client), None)
+        if session is not None:
+            stop, task = session
+            stop.set()
+            await task
+
+    async def start(self) -> None:
+        """Open the sessions and cache the tool list."""
+        async with self._start_lock:
+            if self.started:
+                return
+            logger.info(f"Starting {self.size} MCP sessions to {self.server_path}")
+            clients = await asyncio.gather(*(self._connect() for _ in range(self.size)))
+            self._tools = await clients[0].list_tools()
+            idle: asyncio.Queue = asyncio.Queue()
+            for client in clients:
+                idle.put_nowait(client)
+            self._idle = idle
+
+    async def close(self) -> None:
+        """Close every session, including those checked out by requests."""
+        if self._idle is None:
+            return
+        self._idle = None
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        self._last_used.clear()
+        for stop, _ in sessions:
+            stop.set()
+        await asyncio.gather(*(task for _, task in sessions))
+        self._tools = None
+
+    async def _ensure_healthy(self, client: "Client") -> "Client":
+        """Return a working session, reconnecting if the old one is dead."""
+        idle_for = time.monotonic() - self._last_used.get(id(client), 0.0)
+        if client.is_connected() and idle_for < self.healthcheck_interval:
+            return client
+        try:
+            if client.is_connected():
+                self._tools = await client.list_tools()
+                return client
+        except Exception as e:
+            logger.warning(f"MCP session failed its health check: {e}")
+        await self._disconnect(client)
+        logger.info("Reconnecting MCP session")
+        return await self._connect()
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator["Client"]:
+        """Borrow a healthy session for the duration of the block."""
+        if not self.started:
+            await self.start()
+        idle = self._idle
+        client = await idle.get()
+        try:
+            client = await self._ensure_healthy(client)
+            yield client
+        finally:
+            # A session closed by ``close`` while checked out is not returned
+            if id(client) in self._sessions:
+                self._last_used[id(client)] = time.monotonic()
+                idle.put_nowait(client)
+
+    def status(self) -> dict:
+        """Return the pool size and the cached tool names."""
+        return {
+            "server_path": self.server_path,
+            "size": self.size,
+            "started": self.started,
+            "tools": [tool.name for tool in self._tools or []],
+        }
+
+
+mcp_pool = MCPSessionPool()
@@ -0,0 +1,75 @@
+from typing import Literal
+
+from loguru import logger
+
+from backend.constants import Title, Volume
+from backend.rag import query_qdrant
+
+
+def retrieve_text(
+    query: str,
+    title: Literal[
+        Title.AN_SI_TOAN_THU,
+        Title.KINH_TUONG_UNG_BO,
+        Title.QUAN_AM_THI_KINH,
+        Title.THIEN_UYEN_TAP_ANH,
+    ]
+    | str
+    | None = None,
+) -> list[dict]:
+    """Retrieve text from the database.
+
+    Args:
+        query: The query to retrieve text from the database.
+        title: The title of the book to retrieve. Carefully choosing this
+        value, only define it the user prompt is specific, or needs to confirm
+        with user first.
+
+    """
+    logger.info(f"Calling retrieve_text tool with arguments: {query}, {title}")
+    if not title:
+        return query_qdrant(query)
+
+    if isinstance(title, Title):
+        title = title.value
+
+    metadata_filter = {
+        "title": title,
+    }
+    return query_qdrant(query, metadata_filter=metadata_filter)
+
+
+def filter_by_volume(
+    query: str,
+    volume: Literal[
+        Volume.AN_SI_TOAN_THU_QUYEN_I,
+        Volume.AN_SI_TOAN_THU_QUYEN_II,
+        Volume.AN_SI_TOAN_THU_QUYEN_III,
+        Volume.AN_SI_TOAN_THU_QUYEN_IV,
+    ],
+) -> list[dict]:
+    """Filter the text by volume.
+
+    Args:
+        query: The query to retrieve text from the database.
+        volume: The volume of the book to retrieve. This tool is used only for
+        'An Sĩ Toàn Thư' book. Use only when user explicitly asks for a
+        specific volume.
+
+    """
+    logger.info(
+        f"Calling filter_by_volume tool with arguments: {query}, {volume}",
+    )
+    if isinstance(volume, Volume):
+        volume = volume.value
+
+    return query_qdrant(
+        query,
+        metadata_filter={
+            "volume": volume,
+        },
+    )
+
+
+# Tools exposed to the LLM, both over MCP and in-process
+TOOL_FUNCTIONS = [retrieve_text, filter_by_volume]
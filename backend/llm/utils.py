@@ -1,17 +1,23 @@
 import asyncio
 import json
 import os
-from typing import Any
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, Any
 
 import json_repair
-import openai
 from dotenv import load_dotenv
-from fastmcp import Client
 from loguru import logger
-from mcp import Tool
-from mcp.types import CallToolResult
 from openai.types.chat import ChatCompletionMessageToolCall, ChatCompletionToolParam
 
+from backend.config import TOOL_CONCURRENCY, TOOL_TIMEOUT
+
+# fastmcp is only needed with TOOL_EXECUTION_MODE=mcp, so it is imported when
+# a tool is called through MCP
+if TYPE_CHECKING:
+    from fastmcp import Client
+    from mcp import Tool
+    from mcp.types import CallToolResult
+
 load_dotenv()
 
 
@@ -23,7 +29,7 @@ def sanitize_tool_name(name: str) -> str:
 
 # https://github.com/bartolli/mcp-llm-bridge/blob/main/src/mcp_llm_bridge/bridge.py#L86
 def convert_tools_to_openai_format(
-    tools: list[Tool],
+    tools: "list[Tool]",
 ) -> list[ChatCompletionToolParam]:
     """Convert tools to OpenAI format."""
     openai_tools = []
@@ -35,11 +41,10 @@ def convert_tools_to_openai_format(
             "function": {
                 "name": sanitize_tool_name(tool.name),
                 "description": tool.description,
-                "parameters": getattr(
-                    tool,
-                    "inputSchema",
-                    {"type": "object", "properties": {}, "required": []},
-                ),
+                # Older mcp releases name the field inputSchema, newer ones input_schema
+                "parameters": getattr(tool, "inputSchema", None)
+                or getattr(tool, "input_schema", None)
+                or {"type": "object", "properties": {}, "required": []},
             },
         }
         openai_tools.append(this_tool)
@@ -48,9 +53,9 @@ def convert_tools_to_openai_format(
 
 
 def _get_appropriate_tool(
-    tools: list[Tool],
+    tools: "list[Tool]",
     tool_name: str,
-) -> Tool | None:
+) -> "Tool | None":
     """Get appropriate tool."""
     return next(
         (tool for tool in tools if sanitize_tool_name(tool.name) == tool_name),
@@ -58,7 +63,7 @@ def _get_appropriate_tool(
     )
 
 
-def _parse_tool_result(result: CallToolResult) -> Any:
+def _parse_tool_result(result: "CallToolResult") -> Any:
     """Parse tool result."""
     content_type = result.content[0].type
     if content_type == "text":
@@ -85,9 +90,14 @@ async def handle_tool_call(
     tool_name: str,
     tool_args: dict | str,
     mcp_server_path: str | None = None,
-    mcp_client: Client | None = None,
+    mcp_client: "Client | None" = None,
+    available_tools: "list[Tool] | None" = None,
 ) -> Any:
-    """Handle tool call."""
+    """Handle tool call.
+
+    Passing the already known ``available_tools`` of ``mcp_client`` skips
+    listing the tools again.
+    """
     if not mcp_server_path and not mcp_client:
         raise ValueError(
             "Either mcp_server_path or mcp_client must be provided",
@@ -101,6 +111,8 @@ async def handle_tool_call(
             ) from exc
 
     if mcp_server_path:
+        from fastmcp import Client
+
         async with Client(mcp_server_path) as client:
             tools = await client.list_tools()
             appropriate_tool = _get_appropriate_tool(tools, tool_name)
@@ -109,7 +121,7 @@ async def handle_tool_call(
             result = await client.call_tool(appropriate_tool.name, tool_args)
             return _parse_tool_result(result)
 
-    tools = await mcp_client.list_tools()
+    tools = available_tools or await mcp_client.list_tools()
     appropriate_tool = _get_appropriate_tool(tools, tool_name)
     if not appropriate_tool:
         raise ValueError(f"Tool {tool_name} not found")
@@ -117,10 +129,49 @@ async def handle_tool_call(
     return _parse_tool_result(result)
 
 
+async def run_tool_calls(
+    tool_calls: list[ChatCompletionMessageToolCall],
+    call: Callable[[str, dict | str], Awaitable[Any]],
+    max_concurrency: int = TOOL_CONCURRENCY,
+    tool_timeout: float = TOOL_TIMEOUT,
+) -> list[dict]:
+    """Run the tool calls of one assistant turn concurrently.
+
+    At most ``max_concurrency`` calls run at once and each one is bounded by
+    ``tool_timeout`` seconds. A call that fails or times out yields an error
+    message instead of aborting the turn, so the LLM can still answer. The
+    tool messages keep the order of ``tool_calls``.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(tool_call: ChatCompletionMessageToolCall) -> dict:
+        tool_name = tool_call.function.name
+        async with semaphore:
+            try:
+                content = await asyncio.wait_for(
+                    call(tool_name, tool_call.function.arguments),
+                    tool_timeout,
+                )
+            except TimeoutError:
+                logger.warning(f"Tool {tool_name} timed out after {tool_timeout}s")
+                content = f"Error: tool {tool_name} timed out"
+            except Exception as e:
+                logger.error(f"Tool {tool_name} failed: {e}")
+                content = f"Error: tool {tool_name} failed: {e}"
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "content": content,
+        }
+
+    return list(await asyncio.gather(*(run_one(tool_call) for tool_call in tool_calls)))
+
+
 async def call_and_return_tool_result(
     tools: list[ChatCompletionMessageToolCall] | None = None,
     mcp_server_path: str | None = None,
-    mcp_client: Client | None = None,
+    mcp_client: "Client | None" = None,
+    available_tools: "list[Tool] | None" = None,
 ) -> Any:
     """Call and return tool result."""
     if not mcp_server_path and not mcp_client:
@@ -131,26 +182,23 @@ async def call_and_return_tool_result(
     if not tools:
         return []
 
-    results = []
-    for tool in tools:
-        result = await handle_tool_call(
-            tool_name=tool.function.name,
-            tool_args=tool.function.arguments,
+    async def call(tool_name: str, tool_args: dict | str) -> Any:
+        return await handle_tool_call(
+            tool_name=tool_name,
+            tool_args=tool_args,
             mcp_server_path=mcp_server_path,
             mcp_client=mcp_client,
+            available_tools=available_tools,
         )
-        results.append(
-            {
-                "role": "tool",
-                "tool_call_id": tool.id,
-                "content": result,
-            },
-        )
-    return results
+
+    return await run_tool_calls(tools, call)
 
 
 async def main() -> None:
     """Implement the main function."""
+    import openai
+    from fastmcp import Client
+
     async with Client("backend/llm/tools.py") as client:
         tools = await client.list_tools()
         logger.info(f"Type of tools: {type(tools)}")
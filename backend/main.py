@@ -1,19 +1,38 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+
+import numpy as np
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from loguru import logger
 
-from backend.config import COLLECTION_NAME, PORT
+from backend.batcher import embedding_batcher
+from backend.cache import semantic_cache
+from backend.config import COLLECTION_NAME, PORT, RERANK_CANDIDATES
 from backend.constants import BOOK_ID_MAP
-from backend.llm import generate_answer, generate_answer_with_tools
+from backend.encoder import model_registry
+from backend.health import readiness_probe
+from backend.llm import agenerate_answer, astream_answer, generate_answer_with_tools
+from backend.llm.executors import tool_executor
+from backend.llm.mcp_pool import mcp_pool
 from backend.models import (
     Book,
     BooksResponse,
+    HealthResponse,
     QueryRequest,
     QueryResponse,
+    ReadinessResponse,
     RelevantText,
+    StatusResponse,
 )
-from backend.rag import query_qdrant
+from backend.qdrant_pool import qdrant_pool
+from backend.rag import aembed_query, ahybrid_query, aquery_qdrant, embedding_cache
+from backend.reranker import reranker
+from backend.warmup import warmup
 
 logger.remove()
 logger.add(
@@ -22,7 +41,23 @@ logger.add(
     level="INFO",
 )
 
-app = FastAPI()
+NO_ANSWER_MESSAGE = "Không tìm thấy thông tin về câu hỏi này"
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Warm the encoder and clients in the background, close them on shutdown."""
+    warmup_task = asyncio.create_task(warmup.run())
+    yield
+    warmup_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await warmup_task
+    await tool_executor.close()
+    await qdrant_pool.aclose()
+    embedding_batcher.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -40,9 +75,47 @@ app.add_middleware(
 
 
 @app.get("/")
-async def health_check() -> dict[str, str]:
-    """Implement the health check endpoint."""
-    return {"status": "ok"}
+async def health_check(response: Response) -> dict[str, str]:
+    """Report ok once the warm-up has finished, 503 before that."""
+    if warmup.ready:
+        return {"status": "ok"}
+    response.status_code = 503
+    return {"status": "starting"}
+
+
+@app.get("/healthz", response_model=HealthResponse)
+async def liveness() -> HealthResponse:
+    """Report that the process is up and its event loop responds."""
+    return HealthResponse(status="ok")
+
+
+@app.get("/readyz", response_model=ReadinessResponse)
+async def readiness(response: Response) -> ReadinessResponse:
+    """Report whether the encoder is loaded and the Qdrant collection is usable.
+
+    Answers 503 until every check passes, without embedding anything or
+    calling the LLM.
+    """
+    ready, checks = await readiness_probe.check()
+    if not ready:
+        response.status_code = 503
+    return ReadinessResponse(status="ready" if ready else "not_ready", checks=checks)
+
+
+@app.get("/status", response_model=StatusResponse)
+async def get_status() -> StatusResponse:
+    """Report the loaded models, the Qdrant client pool and cache metrics."""
+    return StatusResponse(
+        models=model_registry.status(),
+        qdrant=qdrant_pool.status(),
+        tool_execution_mode=tool_executor.mode,
+        mcp=mcp_pool.status(),
+        embedding_cache=embedding_cache.stats(),
+        embedding_batcher=embedding_batcher.stats(),
+        semantic_cache=await semantic_cache.stats() if semantic_cache else None,
+        reranker=reranker.stats(),
+        warmup=warmup.status(),
+    )
 
 
 @app.get("/books", response_model=BooksResponse)
@@ -53,30 +126,194 @@ async def get_books() -> BooksResponse:
     return BooksResponse(books=books)
 
 
+async def _embed_request(request: QueryRequest) -> np.ndarray | None:
+    """Embed the query, unless neither the cache nor the retrieval uses it.
+
+    Tool mode runs its own retrievals, so without a semantic cache the
+    vector would be thrown away.
+    """
+    if semantic_cache is None and request.using_tools:
+        return None
+    return await aembed_query(request.query)
+
+
+async def _lookup_cache(request: QueryRequest, query_vector: np.ndarray | None) -> QueryResponse | None:
+    """Return a cached response for a semantically equivalent request."""
+    if semantic_cache is None or query_vector is None:
+        return None
+    return await semantic_cache.lookup(
+        query_vector,
+        top_k=request.top_k,
+        metadata_filter=request.metadata_filter,
+        using_tools=request.using_tools,
+        retrieval_mode=request.retrieval_mode,
+        rerank=request.rerank,
+    )
+
+
+async def _store_cache(
+    request: QueryRequest,
+    query_vector: np.ndarray | None,
+    response: QueryResponse,
+) -> None:
+    """Cache a freshly generated response."""
+    if semantic_cache is None or query_vector is None:
+        return
+    await semantic_cache.store(
+        query_vector,
+        top_k=request.top_k,
+        metadata_filter=request.metadata_filter,
+        using_tools=request.using_tools,
+        response=response,
+        retrieval_mode=request.retrieval_mode,
+        rerank=request.rerank,
+    )
+
+
+async def _retrieve(request: QueryRequest, query_vector: np.ndarray | None) -> list[dict]:
+    """Retrieve the passages for a request with its retrieval mode.
+
+    With reranking, ``RERANK_CANDIDATES`` passages are retrieved and the
+    cross-encoder keeps the best ``top_k``.
+    """
+    top_k = max(RERANK_CANDIDATES, request.top_k) if request.rerank else request.top_k
+    if request.retrieval_mode == "hybrid":
+        relevant_texts = await ahybrid_query(
+            request.query,
+            top_k=top_k,
+            metadata_filter=request.metadata_filter,
+            query_vector=query_vector,
+        )
+    else:
+        relevant_texts = await aquery_qdrant(
+            collection_name=COLLECTION_NAME,
+            query=request.query,
+            top_k=top_k,
+            metadata_filter=request.metadata_filter,
+            query_vector=query_vector,
+        )
+    if not request.rerank:
+        return relevant_texts
+    return await asyncio.to_thread(
+        reranker.rerank,
+        request.query,
+        relevant_texts,
+        top_k=request.top_k,
+        budget_ms=request.rerank_budget_ms,
+    )
+
+
 @app.post("/query", response_model=QueryResponse)
 async def query(request: QueryRequest) -> QueryResponse:
     """Query the Qdrant database."""
     logger.info(f"Request: {request}")
-    relevant_texts = query_qdrant(
-        collection_name=COLLECTION_NAME,
-        query=request.query,
-        top_k=request.top_k,
-        metadata_filter=request.metadata_filter,
-    )
+    query_vector = await _embed_request(request)
+    cached = await _lookup_cache(request, query_vector)
+    if cached:
+        return cached
 
     if request.using_tools:
-        answer = await generate_answer_with_tools(request.query)
-        if not answer:
-            answer = "Không tìm thấy thông tin về câu hỏi này"
+        # The tools run their own retrievals, the citations are what they found
+        answer, relevant_texts = await generate_answer_with_tools(request.query)
     else:
-        answer = generate_answer(request.query, relevant_texts)
-        if not answer:
-            answer = "Không tìm thấy thông tin về câu hỏi này"
+        relevant_texts = await _retrieve(request, query_vector)
+        answer = await agenerate_answer(request.query, relevant_texts)
 
-    return QueryResponse(
-        answer=answer,
+    response = QueryResponse(
+        answer=answer or NO_ANSWER_MESSAGE,
         relevant_texts=[RelevantText(**text) for text in relevant_texts],
     )
+    if answer:
+        await _store_cache(request, query_vector, response)
+    return response
+
+
+def _format_sse(event: str, data: object) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _stream_cached(cached: QueryResponse) -> AsyncIterator[str]:
+    """Replay a cached response as SSE events."""
+    yield _format_sse("citations", [text.model_dump() for text in cached.relevant_texts])
+    yield _format_sse("token", {"content": cached.answer})
+    yield _format_sse("done", {})
+
+
+async def _stream_tool_answer(request: QueryRequest, query_vector: np.ndarray | None) -> AsyncIterator[str]:
+    """Run the tool loop, then send the passages the tools retrieved and the answer.
+
+    The tool loop needs complete assistant messages, so the answer is sent
+    as a single chunk once the loop has finished.
+    """
+    answer, relevant_texts = await generate_answer_with_tools(request.query)
+    citations = [RelevantText(**text) for text in relevant_texts]
+    yield _format_sse("citations", [citation.model_dump() for citation in citations])
+    yield _format_sse("token", {"content": answer or NO_ANSWER_MESSAGE})
+    yield _format_sse("done", {})
+    if answer:
+        await _store_cache(request, query_vector, QueryResponse(answer=answer, relevant_texts=citations))
+
+
+async def _stream_answer(
+    request: QueryRequest,
+    query_vector: np.ndarray | None,
+    relevant_texts: list[dict],
+    http_request: Request,
+) -> AsyncIterator[str]:
+    """Send the citations, then the answer token by token."""
+    citations = [RelevantText(**text) for text in relevant_texts]
+    yield _format_sse("citations", [citation.model_dump() for citation in citations])
+
+    tokens = astream_answer(request.query, relevant_texts)
+    answer_parts = []
+    try:
+        async for token in tokens:
+            if await http_request.is_disconnected():
+                logger.info("Client disconnected, cancelling the completion")
+                return
+            answer_parts.append(token)
+            yield _format_sse("token", {"content": token})
+    except Exception as e:
+        # The completion stream broke mid-answer; the partial answer is not cached
+        logger.error(f"Error streaming answer: {e}")
+        yield _format_sse("error", {"message": "The answer stream was interrupted"})
+        yield _format_sse("done", {})
+        return
+    finally:
+        await tokens.aclose()
+
+    if not answer_parts:
+        yield _format_sse("token", {"content": NO_ANSWER_MESSAGE})
+    yield _format_sse("done", {})
+    if answer_parts:
+        await _store_cache(
+            request,
+            query_vector,
+            QueryResponse(answer="".join(answer_parts), relevant_texts=citations),
+        )
+
+
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest, http_request: Request) -> StreamingResponse:
+    """Stream the citations first, then the answer token by token over SSE."""
+    logger.info(f"Streaming request: {request}")
+    query_vector = await _embed_request(request)
+    cached = await _lookup_cache(request, query_vector)
+    if cached:
+        events = _stream_cached(cached)
+    elif request.using_tools:
+        # Tool mode cites the passages the tools retrieve during the loop
+        events = _stream_tool_answer(request, query_vector)
+    else:
+        relevant_texts = await _retrieve(request, query_vector)
+        events = _stream_answer(request, query_vector, relevant_texts, http_request)
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 if __name__ == "__main__":
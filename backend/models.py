@@ -1,5 +1,9 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
+from backend.config import RERANK_BUDGET_MS, RERANK_ENABLED
+
 
 class RelevantText(BaseModel):
     """Relevant text from Qdrant."""
@@ -18,6 +22,12 @@ class QueryRequest(BaseModel):
     top_k: int = 5
     metadata_filter: dict[str, str] = Field(default_factory=dict, json_schema_extra={"example": {}})  # type: ignore
     using_tools: bool = False
+    # "hybrid" fuses the dense results with BM25 over the STC sentences
+    retrieval_mode: Literal["dense", "hybrid"] = "dense"
+    # Rescore over-fetched candidates with the cross-encoder, spending at
+    # most rerank_budget_ms on scoring
+    rerank: bool = RERANK_ENABLED
+    rerank_budget_ms: float = Field(default=RERANK_BUDGET_MS, ge=0)
 
 
 class QueryResponse(BaseModel):
@@ -52,3 +62,127 @@ class ToolCall(BaseModel):
 
     id: str
     function: FunctionCall
+
+
+class ModelStatus(BaseModel):
+    """Load statistics of an embedding model held by the registry."""
+
+    name: str
+    backend: str
+    device: str
+    load_seconds: float
+    parameter_bytes: int
+    rss_delta_bytes: int | None = None
+
+
+class QdrantPoolStatus(BaseModel):
+    """Configuration and state of the Qdrant client pool."""
+
+    url: str
+    transport: str
+    max_connections: int
+    max_keepalive_connections: int
+    sync_client_open: bool
+    async_client_open: bool
+
+
+class MCPPoolStatus(BaseModel):
+    """State of the persistent MCP session pool."""
+
+    server_path: str
+    size: int
+    started: bool
+    tools: list[str]
+
+
+class EmbeddingCacheStatus(BaseModel):
+    """Size and hit ratio of the query embedding cache."""
+
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    hit_ratio: float
+
+
+class EmbeddingBatcherStatus(BaseModel):
+    """Batch settings and counters of the query embedding batcher."""
+
+    max_batch_size: int
+    max_wait_ms: float
+    batches: int
+    items: int
+    mean_batch_size: float
+
+
+class SemanticCacheStatus(BaseModel):
+    """Size and hit/miss counters of the semantic answer cache."""
+
+    backend: str
+    threshold: float
+    size: int
+    hits: int
+    misses: int
+    hit_ratio: float
+
+
+class RerankerStatus(BaseModel):
+    """Model and latency counters of the cross-encoder reranker."""
+
+    model: str
+    loaded: bool
+    calls: int
+    truncated: int
+    mean_seconds: float
+
+
+class WarmupStageStatus(BaseModel):
+    """Duration and outcome of the latest attempt of a warm-up stage."""
+
+    name: str
+    seconds: float
+    attempts: int
+    error: str | None = None
+
+
+class WarmupStatus(BaseModel):
+    """Readiness of the backend and the timings of its warm-up stages."""
+
+    ready: bool
+    seconds: float | None = None
+    stages: list[WarmupStageStatus]
+
+
+class StatusResponse(BaseModel):
+    """Response body for the status endpoint."""
+
+    models: list[ModelStatus]
+    qdrant: QdrantPoolStatus
+    tool_execution_mode: str
+    mcp: MCPPoolStatus
+    embedding_cache: EmbeddingCacheStatus
+    embedding_batcher: EmbeddingBatcherStatus
+    semantic_cache: SemanticCacheStatus | None = None
+    reranker: RerankerStatus
+    warmup: WarmupStatus
+
+
+class HealthResponse(BaseModel):
+    """Response body for the liveness endpoint."""
+
+    status: str
+
+
+class ReadinessCheck(BaseModel):
+    """Result of one readiness check."""
+
+    name: str
+    ok: bool
+    detail: str = ""
+
+
+class ReadinessResponse(BaseModel):
+    """Response body for the readiness endpoint."""
+
+    status: str
+    checks: list[ReadinessCheck]
@@ -0,0 +1,172 @@
+import threading
+
+import httpx
+from loguru import logger
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.models import PayloadSchemaType
+
+from backend.config import (
+    COLLECTION_NAME,
+    QDRANT_API_KEY,
+    QDRANT_CREATE_MISSING_INDEXES,
+    QDRANT_GRPC_PORT,
+    QDRANT_POOL_KEEPALIVE_EXPIRY,
+    QDRANT_POOL_MAX_CONNECTIONS,
+    QDRANT_POOL_MAX_KEEPALIVE,
+    QDRANT_PREFER_GRPC,
+    QDRANT_TIMEOUT,
+    QDRANT_URL,
+)
+from backend.constants import KEYWORD_INDEX_FIELDS
+
+
+class QdrantPool:
+    """Long-lived sync and async Qdrant clients shared by all requests.
+
+    Both clients keep their HTTP connections alive between requests, so a
+    query no longer pays connection setup or a TLS handshake. With
+    ``prefer_grpc`` the clients talk to Qdrant over a single multiplexed
+    gRPC channel instead.
+    """
+
+    def __init__(
+        self,
+        url: str = QDRANT_URL,
+        api_key: str | None = QDRANT_API_KEY,
+        prefer_grpc: bool = QDRANT_PREFER_GRPC,
+        grpc_port: int = QDRANT_GRPC_PORT,
+        timeout: int = QDRANT_TIMEOUT,
+        max_connections: int = QDRANT_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections: int = QDRANT_POOL_MAX_KEEPALIVE,
+        keepalive_expiry: float = QDRANT_POOL_KEEPALIVE_EXPIRY,
+    ) -> None:
+        self.url = url
+        self.api_key = api_key
+        self.prefer_grpc = prefer_grpc
+        self.grpc_port = grpc_port
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self._client: QdrantClient | None = None
+        self._async_client: AsyncQdrantClient | None = None
+        self._lock = threading.Lock()
+
+    def _client_kwargs(self) -> dict:
+        """Build the keyword arguments shared by both client flavours."""
+        kwargs = {
+            "url": self.url,
+            "prefer_grpc": self.prefer_grpc,
+            "grpc_port": self.grpc_port,
+            "timeout": self.timeout,
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        }
+        if self.prefer_grpc:
+            kwargs["grpc_options"] = {
+                "grpc.keepalive_time_ms": int(self.keepalive_expiry * 1000),
+                "grpc.keepalive_permit_without_calls": 1,
+            }
+        if self.api_key:
+            kwargs["api_key"] = self.api_key
+        return kwargs
+
+    @property
+    def client(self) -> QdrantClient:
+        """Return the shared synchronous client, creating it on first use."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    logger.info(
+                        f"Opening Qdrant client pool to {self.url} "
+                        f"(grpc={self.prefer_grpc})",
+                    )
+                    self._client = QdrantClient(**self._client_kwargs())
+        return self._client
+
+    @property
+    def async_client(self) -> AsyncQdrantClient:
+        """Return the shared asynchronous client, creating it on first use."""
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    self._async_client = AsyncQdrantClient(
+                        **self._client_kwargs(),
+                    )
+        return self._async_client
+
+    def open(self) -> None:
+        """Create both clients eagerly."""
+        _ = self.client
+        _ = self.async_client
+
+    async def ensure_payload_indexes(
+        self,
+        collection_name: str = COLLECTION_NAME,
+        fields: list[str] = KEYWORD_INDEX_FIELDS,
+        create_missing: bool = QDRANT_CREATE_MISSING_INDEXES,
+    ) -> list[str]:
+        """Check that every filterable field has a keyword payload index.
+
+        Missing indexes are created when ``create_missing`` is set, otherwise
+        they are only reported. Returns the fields still without an index.
+        """
+        try:
+            info = await self.async_client.get_collection(collection_name)
+        except UnexpectedResponse as e:
+            if e.status_code != 404:
+                raise
+            logger.warning(f"Collection '{collection_name}' does not exist, skipping payload index check")
+            return list(fields)
+
+        indexed = {
+            field for field, schema in (info.payload_schema or {}).items()
+            if schema.data_type == PayloadSchemaType.KEYWORD
+        }
+        missing = [field for field in fields if field not in indexed]
+        if not missing:
+            logger.info(f"Payload indexes of '{collection_name}' verified: {', '.join(fields)}")
+            return []
+        if not create_missing:
+            logger.warning(
+                f"Filtered searches on '{collection_name}' scan the payload, "
+                f"missing keyword indexes: {', '.join(missing)}",
+            )
+            return missing
+
+        for field in missing:
+            logger.info(f"Creating keyword payload index on '{collection_name}.{field}'")
+            await self.async_client.create_payload_index(
+                collection_name,
+                field_name=field,
+                field_schema=PayloadSchemaType.KEYWORD,
+                wait=True,
+            )
+        return []
+
+    async def aclose(self) -> None:
+        """Close both clients and drop their connections."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def status(self) -> dict:
+        """Return the pool configuration and which clients are open."""
+        return {
+            "url": self.url,
+            "transport": "grpc" if self.prefer_grpc else "http",
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "sync_client_open": self._client is not None,
+            "async_client_open": self._async_client is not None,
+        }
+
+
+qdrant_pool = QdrantPool()
@@ -1,39 +1,203 @@
+import asyncio
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import numpy as np
 from loguru import logger
-from qdrant_client import QdrantClient
-from qdrant_client.models import FieldCondition, Filter, MatchValue
-from sentence_transformers import SentenceTransformer
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import FieldCondition, Filter, MatchValue, ScoredPoint
 
+from backend.batcher import embedding_batcher, encode_queries
 from backend.config import (
     COLLECTION_NAME,
-    DEVICE,
-    EMBEDDING_MODEL_NAME,
-    QDRANT_API_KEY,
-    QDRANT_URL,
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_EXECUTOR_WORKERS,
+    HYBRID_CANDIDATES,
+    RRF_K,
+)
+from backend.lexical import get_lexical_index
+from backend.qdrant_pool import qdrant_pool
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# Encoding is CPU-bound, so it runs off the event loop. Single queries of the
+# shared model go through the embedding batcher; other models and explicit
+# batches use this small bounded pool, whose size caps how many encodes
+# compete for the cores.
+embedding_executor = ThreadPoolExecutor(
+    max_workers=EMBEDDING_EXECUTOR_WORKERS,
+    thread_name_prefix="embedding",
 )
 
 
+class EmbeddingCache:
+    """Bounded LRU cache from normalized query text to its embedding."""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._vectors: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> np.ndarray | None:
+        """Return the cached embedding and mark it as recently used."""
+        with self._lock:
+            vector = self._vectors.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._vectors.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        """Cache a read-only float32 copy of the embedding."""
+        vector = np.array(vector, dtype=np.float32)
+        vector.flags.writeable = False
+        with self._lock:
+            self._vectors[key] = vector
+            self._vectors.move_to_end(key)
+            while len(self._vectors) > self.max_size:
+                self._vectors.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Return the size and hit ratio of the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._vectors),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+embedding_cache = EmbeddingCache(EMBEDDING_CACHE_SIZE)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize Unicode and whitespace so equivalent queries share a key."""
+    return unicodedata.normalize("NFC", " ".join(query.split()))
+
+
 def connect_to_qdrant() -> QdrantClient:
-    """Connect to Qdrant server."""
-    if QDRANT_API_KEY:
-        return QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
-    return QdrantClient(url=QDRANT_URL)
+    """Return the pooled Qdrant client of this worker."""
+    return qdrant_pool.client
 
 
 def embed_query(
     query: str,
-    embedding_model: SentenceTransformer | None = None,
-) -> list[float]:
-    """Embed the query with the embedding model."""
+    embedding_model: "SentenceTransformer | None" = None,
+) -> np.ndarray:
+    """Embed the query with the embedding model.
+
+    Embeddings of the shared model are cached by normalized query text, so
+    repeated and retried queries skip the encoder. Cache misses go through
+    the embedding batcher, which encodes concurrent queries together.
+    """
+    query = normalize_query(query)
+    if embedding_model is not None:
+        logger.info(f"Embedding query: {query}")
+        return embedding_model.encode(
+            query,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        ).astype(np.float32)
+
+    cached = embedding_cache.get(query)
+    if cached is not None:
+        return cached
+    logger.info(f"Embedding query: {query}")
+    vector = embedding_batcher.embed(query)
+    embedding_cache.put(query, vector)
+    return vector
+
+
+async def aembed_query(
+    query: str,
+    embedding_model: "SentenceTransformer | None" = None,
+) -> np.ndarray:
+    """Embed the query without blocking the event loop.
+
+    Queries for the shared model wait on the embedding batcher directly, so
+    concurrent requests are not capped by the executor threads and can
+    share a batch. Other models run on the embedding executor.
+    """
+    if embedding_model is not None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            embedding_executor,
+            embed_query,
+            query,
+            embedding_model,
+        )
+
+    query = normalize_query(query)
+    cached = embedding_cache.get(query)
+    if cached is not None:
+        return cached
     logger.info(f"Embedding query: {query}")
-    embedding_model = embedding_model or SentenceTransformer(
-        EMBEDDING_MODEL_NAME,
-        device=DEVICE,
+    vector = await asyncio.wrap_future(embedding_batcher.submit(query))
+    embedding_cache.put(query, vector)
+    return vector
+
+
+def embed_queries(queries: list[str]) -> list[np.ndarray]:
+    """Embed several queries with a single encoder pass.
+
+    Cached queries are reused, the others are encoded as one batch and
+    added to the cache, so ``embed_query`` finds them afterwards.
+    """
+    keys = [normalize_query(query) for query in queries]
+    vectors = {key: embedding_cache.get(key) for key in dict.fromkeys(keys)}
+    missing = [key for key, vector in vectors.items() if vector is None]
+    if missing:
+        logger.info(f"Embedding {len(missing)} queries in one batch")
+        encoded = encode_queries(missing)
+        for key, vector in zip(missing, encoded, strict=True):
+            embedding_cache.put(key, vector)
+            vectors[key] = vector
+    return [vectors[key] for key in keys]
+
+
+async def aembed_queries(queries: list[str]) -> list[np.ndarray]:
+    """Embed several queries on the embedding executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(embedding_executor, embed_queries, queries)
+
+
+def build_filter(metadata_filter: dict | None) -> Filter | None:
+    """Build a Qdrant filter matching every key/value of the metadata."""
+    if not metadata_filter:
+        return None
+    return Filter(
+        must=[
+            FieldCondition(
+                key=key,
+                match=MatchValue(value=value),
+            )
+            for key, value in metadata_filter.items()
+        ],
     )
-    return embedding_model.encode(
-        query,
-        normalize_embeddings=True,
-        convert_to_numpy=True,
-    ).tolist()
+
+
+def to_relevant_texts(points: list[ScoredPoint]) -> list[dict]:
+    """Convert scored points into the dictionaries returned to callers."""
+    return [
+        {
+            "score": r.score,
+            "text": r.payload["text"] if r.payload else "",
+            "book_id": r.payload.get("book_id", "") if r.payload else "",
+            "chapter_id": r.payload.get("chapter_id", "") if r.payload else "",
+            "page": r.payload.get("page", "") if r.payload else "",
+        }
+        for r in points
+    ]
 
 
 def query_qdrant(
@@ -42,47 +206,118 @@ def query_qdrant(
     top_k: int = 5,
     metadata_filter: dict | None = None,
     collection_name: str = COLLECTION_NAME,
-    embedding_model: SentenceTransformer | None = None,
+    embedding_model: "SentenceTransformer | None" = None,
+    query_vector: np.ndarray | None = None,
 ) -> list[dict]:
-    """Query Qdrant with a given query."""
-    client = client or connect_to_qdrant()
+    """Query Qdrant with a given query.
+
+    A precomputed ``query_vector`` skips embedding the query again.
+    """
+    client = client or qdrant_pool.client
 
     logger.info(
         f"Querying Qdrant collection '{collection_name}' with query: {query}",
     )
 
-    qdrant_filter = None
-    if metadata_filter:
-        qdrant_filter = Filter(
-            must=[
-                FieldCondition(
-                    key=key,
-                    match=MatchValue(value=value),
-                )
-                for key, value in metadata_filter.items()
-            ],
-        )
+    if query_vector is None:
+        query_vector = embed_query(query, embedding_model)
 
-    query_vector = embed_query(query, embedding_model)
+    response = client.query_points(
+        collection_name=collection_name,
+        query=query_vector,
+        limit=top_k,
+        with_payload=True,
+        query_filter=build_filter(metadata_filter),
+    )
+    return to_relevant_texts(response.points)
+
+
+async def aquery_qdrant(
+    query: str,
+    client: AsyncQdrantClient | None = None,
+    top_k: int = 5,
+    metadata_filter: dict | None = None,
+    collection_name: str = COLLECTION_NAME,
+    embedding_model: "SentenceTransformer | None" = None,
+    query_vector: np.ndarray | None = None,
+) -> list[dict]:
+    """Query Qdrant asynchronously with a given query.
 
-    results = client.search(
+    A precomputed ``query_vector`` skips embedding the query again.
+    """
+    client = client or qdrant_pool.async_client
+
+    logger.info(
+        f"Querying Qdrant collection '{collection_name}' with query: {query}",
+    )
+
+    if query_vector is None:
+        query_vector = await aembed_query(query, embedding_model)
+
+    response = await client.query_points(
         collection_name=collection_name,
-        query_vector=query_vector,
+        query=query_vector,
         limit=top_k,
         with_payload=True,
-        query_filter=qdrant_filter,
+        query_filter=build_filter(metadata_filter),
     )
+    return to_relevant_texts(response.points)
 
-    return [
-        {
-            "score": r.score,
-            "text": r.payload["text"] if r.payload else "",
-            "book_id": r.payload.get("book_id", "") if r.payload else "",
-            "chapter_id": r.payload.get("chapter_id", "") if r.payload else "",
-            "page": r.payload.get("page", "") if r.payload else "",
-        }
-        for r in results
-    ]
+
+def reciprocal_rank_fusion(
+    rankings: list[list[dict]],
+    top_k: int,
+    k: int = RRF_K,
+) -> list[dict]:
+    """Fuse ranked passage lists with reciprocal rank fusion.
+
+    A passage scores the sum of ``1 / (k + rank)`` over the lists it appears
+    in. Scores are divided by their maximum, ``len(rankings) / (k + 1)``, so a
+    passage ranked first by every retriever scores 1.
+    """
+    fused: dict[str, tuple[float, dict]] = {}
+    for ranking in rankings:
+        for rank, passage in enumerate(ranking, start=1):
+            key = " ".join(passage["text"].split())
+            score, first_seen = fused.get(key, (0.0, passage))
+            fused[key] = (score + 1 / (k + rank), first_seen)
+    best = sorted(fused.values(), key=lambda item: item[0], reverse=True)[:top_k]
+    max_score = len(rankings) / (k + 1)
+    return [{**passage, "score": score / max_score} for score, passage in best]
+
+
+def lexical_search(
+    query: str,
+    top_k: int = 5,
+    metadata_filter: dict | None = None,
+) -> list[dict]:
+    """Search the BM25 index over the STC sentences."""
+    return get_lexical_index().search(query, top_k=top_k, metadata_filter=metadata_filter)
+
+
+async def ahybrid_query(
+    query: str,
+    top_k: int = 5,
+    metadata_filter: dict | None = None,
+    query_vector: np.ndarray | None = None,
+    candidates: int = HYBRID_CANDIDATES,
+) -> list[dict]:
+    """Run dense and BM25 retrieval concurrently and fuse them with RRF.
+
+    Each retriever returns ``candidates`` passages, so a passage ranked low
+    by one retriever but high by the other can still reach the ``top_k``.
+    """
+    candidates = max(candidates, top_k)
+    dense, lexical = await asyncio.gather(
+        aquery_qdrant(
+            query,
+            top_k=candidates,
+            metadata_filter=metadata_filter,
+            query_vector=query_vector,
+        ),
+        asyncio.to_thread(lexical_search, query, candidates, metadata_filter),
+    )
+    return reciprocal_rank_fusion([dense, lexical], top_k)
 
 
 if __name__ == "__main__":
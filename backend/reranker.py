@@ -0,0 +1,113 @@
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+from backend.config import (
+    RERANK_BATCH_SIZE,
+    RERANK_BUDGET_MS,
+    RERANKER_DEVICE,
+    RERANKER_MODEL_NAME,
+)
+
+# Imported on first use like the embedding model, see backend.encoder
+if TYPE_CHECKING:
+    from sentence_transformers import CrossEncoder
+
+
+class Reranker:
+    """Cross-encoder that rescores retrieved passages against the query.
+
+    Candidates are scored in batches, best-ranked first. Once the latency
+    budget is spent the remaining candidates are not scored and keep their
+    retrieval order behind the reranked ones.
+    """
+
+    def __init__(
+        self,
+        model_name: str = RERANKER_MODEL_NAME,
+        device: str = RERANKER_DEVICE,
+        batch_size: int = RERANK_BATCH_SIZE,
+    ) -> None:
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = batch_size
+        self._model: CrossEncoder | None = None
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._truncated = 0
+        self._seconds = 0.0
+
+    @property
+    def model(self) -> "CrossEncoder":
+        """Return the cross-encoder, loading it on first use."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+
+                    logger.info(f"Loading reranker model: {self.model_name} on device: {self.device}")
+                    start_time = time.perf_counter()
+                    self._model = CrossEncoder(self.model_name, device=self.device)
+                    logger.info(f"Loaded reranker model in {time.perf_counter() - start_time:.2f}s")
+        return self._model
+
+    def is_loaded(self) -> bool:
+        """Check whether the cross-encoder has been loaded."""
+        return self._model is not None
+
+    def rerank(
+        self,
+        query: str,
+        passages: list[dict],
+        top_k: int = 5,
+        budget_ms: float = RERANK_BUDGET_MS,
+    ) -> list[dict]:
+        """Return the ``top_k`` passages with the highest cross-encoder score.
+
+        Reranked passages carry the cross-encoder score, in [0, 1], instead of
+        their retrieval score.
+        """
+        model = self.model
+        start_time = time.perf_counter()
+        deadline = start_time + budget_ms / 1000
+        scored: list[tuple[float, dict]] = []
+        for start in range(0, len(passages), self.batch_size):
+            if time.perf_counter() >= deadline:
+                break
+            batch = passages[start:start + self.batch_size]
+            scores = model.predict(
+                [(query, passage["text"]) for passage in batch],
+                batch_size=len(batch),
+                show_progress_bar=False,
+            )
+            scored.extend((float(score), passage) for score, passage in zip(scores, batch, strict=True))
+
+        seconds = time.perf_counter() - start_time
+        truncated = len(scored) < len(passages)
+        self._calls += 1
+        self._truncated += truncated
+        self._seconds += seconds
+        if truncated:
+            logger.warning(
+                f"Reranking stopped after {len(scored)}/{len(passages)} passages, "
+                f"budget of {budget_ms:.0f}ms spent",
+            )
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        reranked = [{**passage, "score": score} for score, passage in scored]
+        return (reranked + passages[len(scored):])[:top_k]
+
+    def stats(self) -> dict:
+        """Return how often reranking ran, ran out of budget, and its mean latency."""
+        return {
+            "model": self.model_name,
+            "loaded": self.is_loaded(),
+            "calls": self._calls,
+            "truncated": self._truncated,
+            "mean_seconds": self._seconds / self._calls if self._calls else 0.0,
+        }
+
+
+reranker = Reranker()
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from loguru import logger
+
+from backend.batcher import encode_queries
+from backend.config import LEXICAL_WARMUP, RERANK_ENABLED
+from backend.lexical import get_lexical_index
+from backend.llm.executors import ToolExecutor, tool_executor
+from backend.qdrant_pool import QdrantPool, qdrant_pool
+from backend.reranker import Reranker, reranker
+
+
+@dataclass
+class WarmupStage:
+    """Outcome of the latest attempt of one warm-up stage."""
+
+    name: str
+    seconds: float
+    attempts: int
+    error: str | None = None
+
+
+class Warmup:
+    """Explicit warm-up of the encoder, lexical index and clients, timed stage by stage.
+
+    The server starts accepting connections right away and warms up in the
+    background; ``ready`` turns true once every stage has succeeded. Failed
+    stages, e.g. Qdrant still starting, are retried every ``retry_interval``
+    seconds. The reranker is only warmed up when reranking is on by default,
+    and the lexical index only when ``lexical`` is set; otherwise it is built
+    by the first hybrid query.
+    """
+
+    def __init__(
+        self,
+        pool: QdrantPool = qdrant_pool,
+        executor: ToolExecutor = tool_executor,
+        cross_encoder: Reranker | None = reranker if RERANK_ENABLED else None,
+        lexical: bool = LEXICAL_WARMUP,
+        retry_interval: float = 5.0,
+    ) -> None:
+        self.pool = pool
+        self.executor = executor
+        self.cross_encoder = cross_encoder
+        self.lexical = lexical
+        self.retry_interval = retry_interval
+        self.stages: dict[str, WarmupStage] = {}
+        self.ready = False
+        self.seconds: float | None = None
+
+    async def _warm_encoder(self) -> None:
+        """Load the encoder and run one forward pass."""
+        await asyncio.to_thread(encode_queries, ["warm-up"])
+
+    async def _warm_lexical(self) -> None:
+        """Build the BM25 index used by hybrid retrieval."""
+        await asyncio.to_thread(get_lexical_index)
+
+    async def _warm_reranker(self) -> None:
+        """Load the cross-encoder and score one pair."""
+        await asyncio.to_thread(self.cross_encoder.model.predict, [("warm-up", "warm-up")], show_progress_bar=False)
+
+    async def _warm_qdrant(self) -> None:
+        """Create the Qdrant clients, open a connection and verify the payload indexes."""
+        self.pool.open()
+        await self.pool.async_client.get_collections()
+        await self.pool.ensure_payload_indexes()
+
+    async def _warm_tools(self) -> None:
+        """Start the tool executor."""
+        await self.executor.start()
+
+    async def _stage(self, name: str, warm: Callable[[], Awaitable[None]]) -> bool:
+        """Run and time one stage, recording its error if it fails."""
+        previous = self.stages.get(name)
+        start_time = time.perf_counter()
+        error = None
+        try:
+            await warm()
+        except Exception as e:
+            error = str(e)
+            logger.error(f"Warm-up stage '{name}' failed: {e}")
+        self.stages[name] = WarmupStage(
+            name=name,
+            seconds=time.perf_counter() - start_time,
+            attempts=previous.attempts + 1 if previous else 1,
+            error=error,
+        )
+        return error is None
+
+    async def run(self) -> None:
+        """Run every stage until all have succeeded, then log their timings."""
+        start_time = time.perf_counter()
+        pending = {
+            "encoder": self._warm_encoder,
+            "qdrant": self._warm_qdrant,
+            "tools": self._warm_tools,
+        }
+        if self.lexical:
+            pending["lexical"] = self._warm_lexical
+        if self.cross_encoder is not None:
+            pending["reranker"] = self._warm_reranker
+        while True:
+            for name, warm in list(pending.items()):
+                if await self._stage(name, warm):
+                    del pending[name]
+            if not pending:
+                break
+            logger.info(f"Retrying warm-up of {', '.join(pending)} in {self.retry_interval:.0f}s")
+            await asyncio.sleep(self.retry_interval)
+        self.seconds = time.perf_counter() - start_time
+        self.ready = True
+        timings = ", ".join(f"{stage.name}={stage.seconds:.2f}s" for stage in self.stages.values())
+        logger.info(f"Warm-up finished in {self.seconds:.2f}s ({timings})")
+
+    def status(self) -> dict:
+        """Return readiness and the latest attempt of every stage."""
+        return {
+            "ready": self.ready,
+            "seconds": self.seconds,
+            "stages": [
+                {
+                    "name": stage.name,
+                    "seconds": stage.seconds,
+                    "attempts": stage.attempts,
+                    "error": stage.error,
+                }
+                for stage in self.stages.values()
+            ],
+        }
+
+
+warmup = Warmup()
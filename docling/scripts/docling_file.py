@@ -1,14 +1,161 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from docling.document_converter import DocumentConverter
+from loguru import logger
 
-base_path = "docling/pdfs"
-all_pdf_files = Path(base_path).glob("*.pdf")
+if TYPE_CHECKING:
+    from docling.document_converter import DocumentConverter
 
-for pdf_file in all_pdf_files:
-    converter = DocumentConverter()
-    result = converter.convert(pdf_file)
-    markdown_content = result.document.export_to_markdown()
-    output_path = pdf_file.with_suffix('.md')
-    with Path(output_path).open("w", encoding="utf-8") as f:
-        f.write(markdown_content)
+BASE_PATH = Path("docling/pdfs")
+# Hash and page count of every converted PDF
+MANIFEST_FILE = "manifest.json"
+
+# Converter processes and the threads of each one
+DOCLING_WORKERS = int(os.getenv("DOCLING_WORKERS", "2"))
+DOCLING_THREADS = int(os.getenv("DOCLING_THREADS", "4"))
+
+# Converter of the current worker process, built once by the pool initializer
+_converter: "DocumentConverter | None" = None
+
+
+def _init_worker(threads: int) -> None:
+    """Pin the thread count of a worker and build its converter."""
+    global _converter
+    # Read by docling and torch when they are imported
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    from docling.document_converter import DocumentConverter
+
+    _converter = DocumentConverter()
+
+
+def _convert(pdf_path: Path) -> tuple[int, float]:
+    """Convert one PDF to markdown next to it, returning pages and seconds."""
+    start_time = time.perf_counter()
+    result = _converter.convert(pdf_path)
+    output_path = pdf_path.with_suffix(".md")
+    tmp_path = output_path.with_name(f"{output_path.name}.tmp")
+    tmp_path.write_text(result.document.export_to_markdown(), encoding="utf-8")
+    tmp_path.replace(output_path)
+    return result.document.num_pages(), time.perf_counter() - start_time
+
+
+def file_hash(path: Path) -> str:
+    """Hash a file in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(path: Path) -> dict:
+    """Load the conversion manifest, or an empty one."""
+    if not path.exists():
+        return {}
+    with path.open(encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(path: Path, manifest: dict) -> None:
+    """Write the conversion manifest atomically."""
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    tmp_path.replace(path)
+
+
+def is_up_to_date(pdf_path: Path, manifest: dict) -> bool:
+    """Check whether the markdown of a PDF is newer than it or its hash is known.
+
+    The hash is only computed when the timestamps do not settle it.
+    """
+    output_path = pdf_path.with_suffix(".md")
+    if not output_path.exists():
+        return False
+    if output_path.stat().st_mtime >= pdf_path.stat().st_mtime:
+        return True
+    entry = manifest.get(pdf_path.name)
+    return entry is not None and entry["sha256"] == file_hash(pdf_path)
+
+
+def convert_pdfs(
+    input_dir: Path = BASE_PATH,
+    workers: int = DOCLING_WORKERS,
+    threads: int = DOCLING_THREADS,
+    force: bool = False,
+) -> None:
+    """Convert the PDFs of ``input_dir`` to markdown across ``workers`` processes.
+
+    Every worker builds its converter, and so loads the layout models, once.
+    PDFs whose markdown is up to date are skipped unless ``force`` is set,
+    and the manifest is saved after every conversion, so an interrupted run
+    only redoes the PDFs in flight.
+    """
+    manifest_path = input_dir / MANIFEST_FILE
+    manifest = load_manifest(manifest_path)
+    pdf_paths = sorted(input_dir.glob("*.pdf"))
+    pending = [path for path in pdf_paths if force or not is_up_to_date(path, manifest)]
+    logger.info(
+        f"Converting {len(pending)} of {len(pdf_paths)} PDFs with {workers} processes x {threads} threads "
+        f"({len(pdf_paths) - len(pending)} up to date)",
+    )
+    if not pending:
+        return
+
+    total_pages = 0
+    start_time = time.perf_counter()
+
+    def record(path: Path, pages: int, seconds: float) -> None:
+        nonlocal total_pages
+        total_pages += pages
+        manifest[path.name] = {"sha256": file_hash(path), "pages": pages}
+        save_manifest(manifest_path, manifest)
+        logger.info(f"Converted {path.name}: {pages} pages in {seconds:.1f}s ({pages / seconds:.2f} pages/s)")
+
+    if workers == 1:
+        _init_worker(threads)
+        for path in pending:
+            try:
+                record(path, *_convert(path))
+            except Exception as e:
+                logger.error(f"Converting {path.name} failed: {e}")
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(pending)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(threads,),
+        ) as pool:
+            futures = {pool.submit(_convert, path): path for path in pending}
+            for future in as_completed(futures):
+                try:
+                    record(futures[future], *future.result())
+                except Exception as e:
+                    logger.error(f"Converting {futures[future].name} failed: {e}")
+
+    elapsed = time.perf_counter() - start_time
+    logger.info(f"✅ Converted {total_pages} pages in {elapsed:.1f}s ({total_pages / elapsed:.2f} pages/s)")
+
+
+def main() -> None:
+    """Convert the PDF corpus to markdown."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert PDFs to markdown with docling")
+    parser.add_argument("--input-dir", type=Path, default=BASE_PATH, help="Directory of the PDFs")
+    parser.add_argument("--workers", type=int, default=DOCLING_WORKERS, help="Converter processes")
+    parser.add_argument("--threads", type=int, default=DOCLING_THREADS, help="Threads of each converter process")
+    parser.add_argument("--force", action="store_true", help="Convert every PDF, even if its markdown is up to date")
+    args = parser.parse_args()
+
+    convert_pdfs(args.input_dir, workers=args.workers, threads=args.threads, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
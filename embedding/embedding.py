@@ -1,38 +1,71 @@
+import hashlib
 import json
 import os
-import uuid
+import shutil
+import sys
+from collections.abc import Callable, Iterator
 from pathlib import Path
 
-import torch
+import numpy as np
 from dotenv import load_dotenv
-from langchain.text_splitter import MarkdownTextSplitter
-from langchain_community.document_loaders import DirectoryLoader
 from loguru import logger
-from sentence_transformers import SentenceTransformer
 
-load_dotenv()
+# Add the project root to Python path so we can import backend modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-device = (
-    "cuda"
-    if torch.cuda.is_available()
-    else "mps"
-    if torch.backends.mps.is_available()
-    else "cpu"
+from backend.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_DIM,
+    EMBEDDING_ONNX_QUANTIZATION,
+    LEXICAL_WINDOW_SIZE,
+    get_device,
 )
+from backend.lexical import iter_sentence_windows
+from embedding.sentences import read_sentences
+from embedding.sharded import ShardedEncoder
+from embedding.store import EmbeddingStore
+
+load_dotenv()
+
+device = "cpu" if EMBEDDING_BACKEND == "onnx" else get_device()
 
 BASE_MD_PATH = Path("docling/pdfs")
 RAW_JSONL_PATH = Path("jsonl/raw")
+CLEANED_JSONL_PATH = Path("jsonl/cleaned")
+XML_PATH = Path("xml")
 EMBEDDING_JSONL_PATH = Path("jsonl/embeddings")
-EMBEDDING_JSONL_PATH.mkdir(parents=True, exist_ok=True)
+EMBEDDING_STORE_PATH = EMBEDDING_JSONL_PATH / "store"
+# Encoded shards of an unfinished run, removed once the store is written
+CHECKPOINT_PATH = EMBEDDING_JSONL_PATH / "checkpoints"
+# Hashes of the embedded files and chunks, kept inside the store
+MANIFEST_FILE = "manifest.json"
 
 MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "intfloat/multilingual-e5-base")
+# Recorded in the manifest: vectors of another model, backend or
+# quantization are encoded again instead of being mixed into the store
+ENCODER_SETTINGS = {
+    "model": MODEL_NAME,
+    "backend": EMBEDDING_BACKEND,
+    "quantization": EMBEDDING_ONNX_QUANTIZATION if EMBEDDING_BACKEND == "onnx" else None,
+}
 BATCH_SIZE = 16
 CHUNK_SIZE = 1024
 CHUNK_OVERLAP = 128
-
-logger.info(f"Loading model: {MODEL_NAME} on device: {device}")
-model = SentenceTransformer(MODEL_NAME, device=device)
-logger.info("Model loaded successfully.")
+# "markdown" chunks the docling output, "stc" embeds windows of STC sentences
+EMBEDDING_SOURCE = os.getenv("EMBEDDING_SOURCE", "markdown")
+# Same windows as the BM25 index, so hybrid fusion matches the passages
+SENTENCE_WINDOW_SIZE = LEXICAL_WINDOW_SIZE
+SHARD_SIZE = 512
+# Chunks held in memory between the splitter and the store
+EMBEDDING_WINDOW_SIZE = int(os.getenv("EMBEDDING_WINDOW_SIZE", "8192"))
+# Encoder processes on CPU and the threads of each one. Every process loads
+# its own model copy, about 1 GB of RSS for e5-base, so 0 picks one process
+# per EMBEDDING_WORKER_THREADS cores but at most DEFAULT_MAX_WORKERS
+DEFAULT_MAX_WORKERS = 4
+EMBEDDING_WORKER_THREADS = int(os.getenv("EMBEDDING_WORKER_THREADS", "2"))
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "0")) or max(
+    1, min(DEFAULT_MAX_WORKERS, (os.cpu_count() or 1) // EMBEDDING_WORKER_THREADS),
+)
 
 
 def load_metadata_from_jsonl(jsonl_path: Path) -> dict:
@@ -48,64 +81,386 @@ def load_metadata_from_jsonl(jsonl_path: Path) -> dict:
             return {}
 
 
-def embed_markdown_chunks(
-    input_dir: str,
-    output_file: str,
-) -> None:
-    """Load markdown files, chunks them, and creates embeddings."""
-    logger.info(f"Loading markdown files from: {input_dir}")
-    loader = DirectoryLoader(input_dir, glob="**/*.md", show_progress=True)
-    docs = loader.load()
+def extra_metadata(path: Path) -> dict:
+    """Load the metadata joined to a markdown file from its NER JSONL file."""
+    return load_metadata_from_jsonl(RAW_JSONL_PATH / f"{path.stem}_with_ner.jsonl")
+
+
+def file_hash(path: Path, extra_meta: dict) -> str:
+    """Hash a markdown file together with the metadata joined to it."""
+    digest = hashlib.sha256(path.read_bytes())
+    digest.update(json.dumps(extra_meta, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()
 
-    # Load metadata and add it to documents
+
+def chunk_hash(text: str, metadata: dict) -> str:
+    """Hash the text and metadata of a chunk."""
+    content = json.dumps(
+        {"text": text, "metadata": metadata},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def markdown_file_hash(path: Path) -> str:
+    """Hash a markdown file together with its NER metadata."""
+    return file_hash(path, extra_metadata(path))
+
+
+def split_markdown_file(path: Path) -> list[dict]:
+    """Load one markdown file and split it into chunk records."""
+    from langchain.text_splitter import MarkdownTextSplitter
+    from langchain_community.document_loaders import UnstructuredFileLoader
+
+    extra_meta = extra_metadata(path)
+    docs = UnstructuredFileLoader(str(path)).load()
     for doc in docs:
-        source_path = Path(doc.metadata["source"])
-        jsonl_filename = f"{source_path.stem}_with_ner.jsonl"
-        jsonl_path = RAW_JSONL_PATH / jsonl_filename
-        extra_meta = load_metadata_from_jsonl(jsonl_path)
         doc.metadata.update(extra_meta)
-
-    logger.info(f"Splitting {len(docs)} documents into chunks...")
     splitter = MarkdownTextSplitter(
         chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP,
     )
-    chunks = splitter.split_documents(docs)
-    logger.info(f"Created {len(chunks)} chunks.")
+    # Chunk IDs are "<document>#<n>" so the uploader derives stable point IDs
+    return [
+        {
+            "id": f"{path.stem}#{n}",
+            "text": chunk.page_content,
+            "metadata": chunk.metadata,
+            "chunk_hash": chunk_hash(chunk.page_content, chunk.metadata),
+        }
+        for n, chunk in enumerate(splitter.split_documents(docs), start=1)
+    ]
+
+
+def sentence_file_hash(path: Path) -> str:
+    """Hash a cleaned JSONL or NER XML sentence file."""
+    return file_hash(path, {})
+
+
+def split_sentence_file(path: Path, window_size: int = SENTENCE_WINDOW_SIZE) -> list[dict]:
+    """Group the STC sentences of a file into passage records.
+
+    A passage holds up to ``window_size`` consecutive sentences of one page
+    and keeps their exact ``page_id`` and ``section_id``, its ID is the ID
+    of its first sentence.
+    """
+    records = []
+    for window in iter_sentence_windows(read_sentences(path), window_size):
+        entities: dict[str, list[str]] = {}
+        for sentence in window:
+            for entity_type, texts in sentence.get("entities", {}).items():
+                entities[entity_type] = list(dict.fromkeys(entities.get(entity_type, []) + texts))
+        text = "\n".join(sentence["text"] for sentence in window)
+        metadata = {
+            **window[0]["meta"],
+            "entities": entities,
+            "sentence_ids": [sentence["id"] for sentence in window],
+        }
+        records.append({
+            "id": window[0]["id"],
+            "text": text,
+            "metadata": metadata,
+            "chunk_hash": chunk_hash(text, metadata),
+        })
+    return records
+
+
+def sentence_paths(jsonl_dir: Path, xml_dir: Path) -> list[Path]:
+    """List the cleaned JSONL files, plus the NER XML files of new books.
+
+    A book is read from its XML file only until it has a cleaned JSONL file.
+    """
+    jsonl_paths = sorted(jsonl_dir.glob("*.jsonl"))
+    cleaned = {path.stem for path in jsonl_paths}
+    xml_paths = [
+        path for path in sorted(xml_dir.glob("*_with_ner.xml"))
+        if path.stem.removesuffix("_with_ner") not in cleaned
+    ]
+    return jsonl_paths + xml_paths
+
+
+def load_manifest(store_path: Path, settings: dict) -> dict:
+    """Load the manifest of an embedding store, if it has a usable one.
+
+    A manifest written with other ``settings``, such as another model, encoder or
+    splitter settings, is ignored, so every chunk gets encoded again.
+    """
+    manifest_path = store_path / MANIFEST_FILE
+    if not EmbeddingStore.exists(store_path) or not manifest_path.exists():
+        return {}
+    with manifest_path.open(encoding="utf-8") as f:
+        manifest = json.load(f)
+    if any(manifest.get(key) != value for key, value in settings.items()):
+        logger.info("Encoder or splitter settings changed, re-embedding every chunk")
+        return {}
+    return manifest
+
+
+class OldRecords:
+    """Read records of the previous store by row, in a single forward pass.
+
+    Unchanged files are visited in the order they were written, so their
+    rows only go forward and the metadata file is read once.
+    """
 
-    texts = [chunk.page_content for chunk in chunks]
+    def __init__(self, store: EmbeddingStore | None) -> None:
+        self.store = store
+        self._rewind()
 
-    # Embed in batches
-    logger.info(f"🔍 Encoding {len(texts)} chunks...")
-    logger.info(f"🔥 Using device: {device}")
-    embeddings = model.encode(
-        texts,
+    def _rewind(self) -> None:
+        self._records = self.store.records() if self.store else iter(())
+        self._row = 0
+
+    def take(self, rows: list[int]) -> list[dict]:
+        """Return the records at ``rows``."""
+        taken = []
+        for row in rows:
+            if row < self._row:
+                self._rewind()
+            for _ in range(row - self._row):
+                next(self._records)
+            taken.append(next(self._records))
+            self._row = row + 1
+        return taken
+
+
+def iter_planned_files(
+    paths: list[Path],
+    manifest: dict,
+    old_rows: dict[str, int],
+    old_records: OldRecords,
+    hash_file: Callable[[Path], str],
+    split_file: Callable[[Path], list[dict]],
+) -> Iterator[tuple[Path, str, list[dict], list[int | None]]]:
+    """Yield every file with its hash, chunk records and rows in the old store.
+
+    Unchanged files come with the records of the old store. Other files are
+    split again, and the row of a chunk is ``None`` when it must be encoded.
+    """
+    for path in paths:
+        digest = hash_file(path)
+        previous = manifest.get("files", {}).get(str(path))
+
+        unchanged = (
+            previous is not None
+            and previous["sha256"] == digest
+            and all(chunk in old_rows for chunk in previous["chunks"])
+        )
+        if unchanged:
+            rows = [old_rows[chunk] for chunk in previous["chunks"]]
+            records = old_records.take(rows)
+        else:
+            records = split_file(path)
+            rows = [old_rows.get(record["chunk_hash"]) for record in records]
+        yield path, digest, records, rows
+
+
+def iter_windows(items: Iterator[tuple], window_size: int) -> Iterator[list[tuple]]:
+    """Group planned files into windows of about ``window_size`` chunks."""
+    window, size = [], 0
+    for item in items:
+        window.append(item)
+        size += len(item[2])
+        if size >= window_size:
+            yield window
+            window, size = [], 0
+    if window:
+        yield window
+
+
+def open_output_store(tmp_path: Path, settings: dict, hash_file: Callable[[Path], str]) -> EmbeddingStore:
+    """Resume the store of an interrupted run, or create an empty one.
+
+    The store is only resumed if it was written with the same settings and
+    none of the files it already holds changed since.
+    """
+    if EmbeddingStore.exists(tmp_path):
+        store = EmbeddingStore.open(tmp_path)
+        state = store.state
+        files = state.get("files", {})
+        resumable = all(state.get(key) == value for key, value in settings.items()) and all(
+            Path(name).exists() and hash_file(Path(name)) == entry["sha256"]
+            for name, entry in files.items()
+        )
+        if resumable:
+            logger.info(f"Resuming {tmp_path}: {len(files)} files, {len(store)} chunks already written")
+            return store
+    store = EmbeddingStore.create(tmp_path, dim=EMBEDDING_DIM, model=MODEL_NAME)
+    store.info["state"] = {**settings, "files": {}}
+    return store
+
+
+def write_window(
+    store: EmbeddingStore,
+    encoder: ShardedEncoder,
+    window: list[tuple[Path, str, list[dict], list[int | None]]],
+    old_vectors: np.ndarray | None,
+) -> int:
+    """Encode the missing chunks of a window and append the window to the store.
+
+    The files of the window are recorded in the store state in the same
+    commit, and the shards of the window are dropped once it is stored.
+    Returns the number of encoded chunks.
+    """
+    to_encode = [
+        record
+        for _, _, records, rows in window
+        for record, row in zip(records, rows, strict=True)
+        if row is None
+    ]
+    encoded_vectors = encoder.encode(
+        [record["text"] for record in to_encode],
+        keys=[record["chunk_hash"] for record in to_encode],
+    )
+    encoded_rows = {record["chunk_hash"]: row for row, record in enumerate(to_encode)}
+
+    state = store.state
+    window_records = []
+    vectors = np.empty((sum(len(records) for _, _, records, _ in window), store.dim), dtype=np.float32)
+    for path, digest, records, rows in window:
+        for record, row in zip(records, rows, strict=True):
+            vectors[len(window_records)] = (
+                old_vectors[row]
+                if row is not None
+                else encoded_vectors[encoded_rows[record["chunk_hash"]]]
+            )
+            window_records.append(record)
+        state["files"][str(path)] = {
+            "sha256": digest,
+            "chunks": [record["chunk_hash"] for record in records],
+        }
+    store.append(window_records, vectors, state=state)
+    encoder.clear_checkpoints()
+    return len(to_encode)
+
+
+def embed_files(
+    paths: list[Path],
+    output_dir: str,
+    settings: dict,
+    hash_file: Callable[[Path], str],
+    split_file: Callable[[Path], list[dict]],
+    incremental: bool = True,
+    workers: int = EMBEDDING_WORKERS,
+    threads: int = EMBEDDING_WORKER_THREADS,
+    window_size: int = EMBEDDING_WINDOW_SIZE,
+) -> None:
+    """Split files into chunk records and embed them into an embedding store.
+
+    Files stream through ``split_file`` and a ``ShardedEncoder`` running
+    ``workers`` processes in windows of about ``window_size`` chunks, and
+    each window is appended to the new store before the next one is read,
+    so memory does not grow with the corpus. An interrupted run resumes
+    after the last stored window.
+
+    In incremental mode, the manifest of the existing store records the
+    hash of every file and chunk. Unchanged files are copied over from the
+    existing store, and only new or edited chunks are encoded.
+    """
+    output_path = Path(output_dir)
+    manifest = load_manifest(output_path, settings) if incremental else {}
+    old_store = EmbeddingStore.open(output_path) if manifest else None
+    old_vectors = old_store.vectors() if old_store else None
+    old_rows = {
+        record["chunk_hash"]: row
+        for row, record in enumerate(old_store.records() if old_store else [])
+        if "chunk_hash" in record
+    }
+
+    # The new store is built next to the old one and replaces it at the end
+    tmp_path = output_path.with_name(f"{output_path.name}.tmp")
+    store = open_output_store(tmp_path, settings, hash_file)
+    done = store.state["files"]
+    paths = [path for path in paths if str(path) not in done]
+
+    # EMBEDDING_BACKEND=onnx embeds the corpus with the same quantized ONNX
+    # model the backend uses for queries
+    logger.info(
+        f"🔍 Embedding {len(paths)} files with {MODEL_NAME} "
+        f"on device: {device} ({EMBEDDING_BACKEND})",
+    )
+    encoder = ShardedEncoder(
+        MODEL_NAME,
+        checkpoint_dir=CHECKPOINT_PATH,
+        device=device,
+        workers=workers,
+        threads=threads,
+        shard_size=SHARD_SIZE,
         batch_size=BATCH_SIZE,
-        normalize_embeddings=True,
-        convert_to_numpy=True,
-        show_progress_bar=True,
     )
+    planned = iter_planned_files(paths, manifest, old_rows, OldRecords(old_store), hash_file, split_file)
+    encoded = 0
+    for window in iter_windows(planned, window_size):
+        encoded += write_window(store, encoder, window, old_vectors)
+        logger.info(f"Stored {len(store)} chunks from {len(store.state['files'])} files")
+
+    with (tmp_path / MANIFEST_FILE).open("w", encoding="utf-8") as f:
+        json.dump(store.state, f, ensure_ascii=False, indent=2)
+    if output_path.exists():
+        shutil.rmtree(output_path)
+    tmp_path.rename(output_path)
+
+    logger.info(
+        f"✅ Saved {len(store)} embedded chunks to: {output_path} "
+        f"({encoded} encoded in this run, {len(store) - encoded} reused or resumed)",
+    )
+
+
+def embed_markdown_chunks(input_dir: str, output_dir: str, **kwargs) -> None:
+    """Chunk the docling markdown files and embed the chunks."""
+    settings = {
+        **ENCODER_SETTINGS,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+    }
+    paths = sorted(Path(input_dir).glob("**/*.md"))
+    logger.info(f"Chunking {len(paths)} markdown files from: {input_dir}")
+    embed_files(paths, output_dir, settings, markdown_file_hash, split_markdown_file, **kwargs)
 
-    # Save output JSONL
-    output_path = Path(output_file)
-    with output_path.open("w", encoding="utf-8") as fout:
-        for chunk, embedding in zip(chunks, embeddings, strict=False):
-            record = {
-                "id": str(uuid.uuid4()),
-                "text": chunk.page_content,
-                "metadata": chunk.metadata,
-                "embedding": embedding.tolist(),
-            }
-            fout.write(json.dumps(record, ensure_ascii=False) + "\n")
 
-    logger.info(f"✅ Saved {len(chunks)} embedded chunks to: {output_path}")
+def embed_stc_sentences(jsonl_dir: str, xml_dir: str, output_dir: str, **kwargs) -> None:
+    """Embed windows of STC sentences from the cleaned JSONL and NER XML files.
+
+    This skips the docling round-trip, and every passage keeps the exact
+    page and section of its sentences.
+    """
+    settings = {
+        **ENCODER_SETTINGS,
+        "source": "stc",
+        "window_size": SENTENCE_WINDOW_SIZE,
+    }
+    paths = sentence_paths(Path(jsonl_dir), Path(xml_dir))
+    logger.info(f"Reading STC sentences from {len(paths)} files in: {jsonl_dir}, {xml_dir}")
+    embed_files(paths, output_dir, settings, sentence_file_hash, split_sentence_file, **kwargs)
 
 
 def main() -> None:
     """Implement the embedding pipeline."""
-    embed_markdown_chunks(
-        input_dir=str(BASE_MD_PATH),
-        output_file=str(EMBEDDING_JSONL_PATH / "embedded_chunks.jsonl"),
-    )
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Embed the corpus")
+    parser.add_argument("--source", choices=["markdown", "stc"], default=EMBEDDING_SOURCE,
+                        help="Chunk the docling markdown, or embed windows of STC sentences")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-embed every chunk instead of only new or changed ones")
+    parser.add_argument("--workers", type=int, default=EMBEDDING_WORKERS,
+                        help="Encoder processes on CPU")
+    parser.add_argument("--threads", type=int, default=EMBEDDING_WORKER_THREADS,
+                        help="Threads of each encoder process")
+    parser.add_argument("--window-size", type=int, default=EMBEDDING_WINDOW_SIZE,
+                        help="Chunks embedded and stored at a time")
+    args = parser.parse_args()
+
+    options = {
+        "incremental": not args.full,
+        "workers": args.workers,
+        "threads": args.threads,
+        "window_size": args.window_size,
+    }
+    if args.source == "stc":
+        embed_stc_sentences(str(CLEANED_JSONL_PATH), str(XML_PATH), str(EMBEDDING_STORE_PATH), **options)
+    else:
+        embed_markdown_chunks(str(BASE_MD_PATH), str(EMBEDDING_STORE_PATH), **options)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,53 @@
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+from defusedxml.ElementTree import iterparse
+
+
+def read_jsonl_sentences(path: str | Path) -> Iterator[dict]:
+    """Yield the STC sentences of a cleaned JSONL file."""
+    with Path(path).open(encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_xml_sentences(path: str | Path) -> Iterator[dict]:
+    """Yield the STC sentences of a NER XML file, in the cleaned JSONL format.
+
+    The file is parsed incrementally and every sentence is cleared once it
+    is yielded, so memory does not grow with the size of the book.
+    """
+    meta: dict = {}
+    section_id = page_id = None
+    for event, element in iterparse(str(path), events=("start", "end")):
+        if event == "start":
+            if element.tag == "SECT":
+                section_id = element.get("ID")
+            elif element.tag == "PAGE":
+                page_id = element.get("ID")
+            continue
+
+        if element.tag == "meta":
+            meta = {child.tag.lower(): " ".join((child.text or "").split()) for child in element}
+        elif element.tag == "STC":
+            entities: dict[str, list[str]] = {}
+            for entity in element.iterfind("NER/*"):
+                entities.setdefault(entity.tag, []).append(" ".join((entity.text or "").split()))
+            yield {
+                "id": element.get("ID"),
+                "text": " ".join((element.text or "").split()),
+                "entities": entities,
+                "meta": {**meta, "section_id": section_id, "page_id": page_id},
+            }
+            element.clear()
+        elif element.tag in ("PAGE", "SECT"):
+            element.clear()
+
+
+def read_sentences(path: str | Path) -> Iterator[dict]:
+    """Yield the STC sentences of a cleaned JSONL or NER XML file."""
+    if Path(path).suffix == ".xml":
+        return read_xml_sentences(path)
+    return read_jsonl_sentences(path)
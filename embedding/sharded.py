@@ -0,0 +1,167 @@
+import hashlib
+import multiprocessing
+import os
+import shutil
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+from loguru import logger
+
+from backend.config import EMBEDDING_BACKEND, EMBEDDING_ONNX_QUANTIZATION
+from backend.encoder import export_onnx_model, model_registry
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# Encoder of the current worker process, loaded once by the pool initializer
+_worker_model: "SentenceTransformer | None" = None
+
+
+def _load_model(model_name: str, device: str, backend: str) -> None:
+    """Load the encoder of the current process."""
+    global _worker_model
+    _worker_model = model_registry.get(model_name, device=device, backend=backend)
+
+
+def _init_worker(model_name: str, device: str, backend: str, threads: int) -> None:
+    """Pin the thread count of a spawned worker and load its encoder."""
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _load_model(model_name, device, backend)
+
+
+def _encode_shard(texts: list[str], path: Path, batch_size: int) -> Path:
+    """Encode one shard in the worker and checkpoint its vectors."""
+    vectors = _worker_model.encode(
+        texts,
+        batch_size=batch_size,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    ).astype(np.float32)
+    tmp_path = path.with_name(f"{path.stem}.tmp.npy")
+    np.save(tmp_path, vectors)
+    tmp_path.replace(path)
+    return path
+
+
+@contextmanager
+def _thread_environment(threads: int) -> Iterator[None]:
+    """Set the thread counts that spawned workers read at import time."""
+    names = ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "EMBEDDING_ONNX_THREADS"]
+    previous = {name: os.environ.get(name) for name in names}
+    os.environ.update(dict.fromkeys(names, str(threads)))
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+class ShardedEncoder:
+    """Encode texts in length-sorted, checkpointed shards across processes.
+
+    Texts are sorted by length before they are cut into shards, so the
+    batches of a shard need little padding. Every shard is saved to
+    ``checkpoint_dir`` under a key derived from its content, and an
+    interrupted run resumes by loading the shards that were already saved.
+    Each worker process loads its own encoder and uses ``threads`` threads.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        checkpoint_dir: str | Path,
+        device: str = "cpu",
+        workers: int = 1,
+        threads: int = 2,
+        shard_size: int = 512,
+        batch_size: int = 16,
+        backend: str = EMBEDDING_BACKEND,
+    ) -> None:
+        self.model_name = model_name
+        self.backend = backend
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.device = device
+        # Processes would only compete for a single GPU
+        self.workers = workers if device == "cpu" else 1
+        self.threads = threads
+        self.shard_size = shard_size
+        self.batch_size = batch_size
+
+    def _shards(self, texts: list[str], keys: list[str]) -> list[tuple[list[int], Path]]:
+        """Cut the texts into length-sorted shards with their checkpoint paths."""
+        order = sorted(range(len(texts)), key=lambda i: (len(texts[i]), keys[i]))
+        # Vectors of another backend or quantization must not be reused
+        quantization = EMBEDDING_ONNX_QUANTIZATION if self.backend == "onnx" else ""
+        encoder = f"{self.model_name}:{self.backend}:{quantization}"
+        shards = []
+        for start in range(0, len(order), self.shard_size):
+            indices = order[start:start + self.shard_size]
+            digest = hashlib.sha256(encoder.encode("utf-8"))
+            for i in indices:
+                digest.update(keys[i].encode("utf-8"))
+            shards.append((indices, self.checkpoint_dir / f"{digest.hexdigest()[:24]}.npy"))
+        return shards
+
+    def encode(self, texts: list[str], keys: list[str]) -> np.ndarray:
+        """Encode ``texts`` into normalized float32 vectors in input order.
+
+        ``keys`` identify the texts, e.g. their content hash, and name the
+        checkpoints.
+        """
+        shards = self._shards(texts, keys)
+        pending = [(indices, path) for indices, path in shards if not path.exists()]
+        if len(pending) < len(shards):
+            logger.info(f"Resuming: {len(shards) - len(pending)}/{len(shards)} shards already checkpointed")
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+        if pending and self.workers == 1:
+            # In-process encoding keeps every core of the main process
+            _load_model(self.model_name, self.device, self.backend)
+            for done, (indices, path) in enumerate(pending, start=1):
+                _encode_shard([texts[i] for i in indices], path, self.batch_size)
+                logger.info(f"Encoded shard {done}/{len(pending)}")
+        elif pending:
+            logger.info(f"Encoding {len(pending)} shards with {self.workers} processes x {self.threads} threads")
+            if self.backend == "onnx":
+                # Export once here, so the workers only load the finished file
+                export_onnx_model(self.model_name)
+            # Spawned workers start clean instead of inheriting torch's thread pools
+            with _thread_environment(self.threads), ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.device, self.backend, self.threads),
+            ) as pool:
+                futures = [
+                    pool.submit(_encode_shard, [texts[i] for i in indices], path, self.batch_size)
+                    for indices, path in pending
+                ]
+                for done, future in enumerate(as_completed(futures), start=1):
+                    future.result()
+                    logger.info(f"Encoded shard {done}/{len(pending)}")
+
+        vectors = None
+        for indices, path in shards:
+            shard = np.load(path)
+            if vectors is None:
+                vectors = np.empty((len(texts), shard.shape[1]), dtype=np.float32)
+            vectors[indices] = shard
+        return vectors if vectors is not None else np.empty((0, 0), dtype=np.float32)
+
+    def clear_checkpoints(self) -> None:
+        """Delete the saved shards once their vectors are stored."""
+        if self.checkpoint_dir.exists():
+            shutil.rmtree(self.checkpoint_dir)
@@ -0,0 +1,126 @@
+import json
+import os
+import shutil
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+
+VECTORS_FILE = "vectors.f32"
+METADATA_FILE = "metadata.jsonl"
+INFO_FILE = "store.json"
+
+
+class EmbeddingStore:
+    """Embeddings stored as a float32 matrix plus a JSONL metadata sidecar.
+
+    Row ``i`` of ``vectors.f32`` is the vector of line ``i`` of
+    ``metadata.jsonl``. ``store.json`` records the model, the dimension and
+    the number of committed rows. An append only counts once ``store.json``
+    is rewritten, so rows left behind by an interrupted write are ignored
+    and cut off by the next append. A writer can commit its own ``state``
+    together with the rows, to know where to resume after a crash.
+    """
+
+    def __init__(self, path: str | Path, info: dict) -> None:
+        self.path = Path(path)
+        self.info = info
+
+    @classmethod
+    def create(cls, path: str | Path, dim: int, model: str) -> "EmbeddingStore":
+        """Create an empty store, replacing any store at ``path``."""
+        path = Path(path)
+        if path.exists():
+            shutil.rmtree(path)
+        path.mkdir(parents=True)
+        (path / VECTORS_FILE).touch()
+        (path / METADATA_FILE).touch()
+        store = cls(path, {"model": model, "dim": dim, "dtype": "float32", "rows": 0, "metadata_bytes": 0})
+        store._write_info()
+        return store
+
+    @classmethod
+    def open(cls, path: str | Path) -> "EmbeddingStore":
+        """Open an existing store."""
+        path = Path(path)
+        with (path / INFO_FILE).open(encoding="utf-8") as f:
+            return cls(path, json.load(f))
+
+    @staticmethod
+    def exists(path: str | Path) -> bool:
+        """Check whether ``path`` holds a store."""
+        return (Path(path) / INFO_FILE).exists()
+
+    @property
+    def model(self) -> str:
+        """Name of the model that produced the vectors."""
+        return self.info["model"]
+
+    @property
+    def dim(self) -> int:
+        """Dimension of the vectors."""
+        return self.info["dim"]
+
+    def __len__(self) -> int:
+        return self.info["rows"]
+
+    def _write_info(self) -> None:
+        """Commit ``store.json`` atomically."""
+        tmp_path = self.path / f"{INFO_FILE}.tmp"
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(self.info, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp_path.replace(self.path / INFO_FILE)
+
+    @property
+    def state(self) -> dict:
+        """State committed by the writer with the last append."""
+        return self.info.get("state", {})
+
+    def append(self, records: list[dict], vectors: np.ndarray, state: dict | None = None) -> None:
+        """Append records and their vectors, durably.
+
+        Records are stored as given, without their vector. ``state`` replaces
+        the writer state in the same commit as the new rows.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(records), self.dim):
+            raise ValueError(
+                f"Expected vectors of shape ({len(records)}, {self.dim}), got {vectors.shape}",
+            )
+        lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+
+        for name, size, data in (
+            (VECTORS_FILE, len(self) * self.dim * 4, memoryview(vectors).cast("B")),
+            (METADATA_FILE, self.info["metadata_bytes"], lines),
+        ):
+            with (self.path / name).open("r+b") as f:
+                # Drop whatever an interrupted append left past the last commit
+                f.truncate(size)
+                f.seek(size)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.info["rows"] += len(records)
+        self.info["metadata_bytes"] += len(lines)
+        if state is not None:
+            self.info["state"] = state
+        self._write_info()
+
+    def vectors(self) -> np.ndarray:
+        """Return the vectors as a read-only memory-mapped matrix."""
+        if not len(self):
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.memmap(self.path / VECTORS_FILE, dtype=np.float32, mode="r", shape=(len(self), self.dim))
+
+    def records(self) -> Iterator[dict]:
+        """Yield the metadata records in row order."""
+        with (self.path / METADATA_FILE).open(encoding="utf-8") as f:
+            for _, line in zip(range(len(self)), f, strict=False):
+                yield json.loads(line)
+
+    def __iter__(self) -> Iterator[tuple[dict, np.ndarray]]:
+        """Yield every record with its vector."""
+        return zip(self.records(), self.vectors(), strict=True)
@@ -61,37 +61,25 @@ class BackendEvaluator:
             return False
 
     def check_backend_health(self) -> bool:
-        """Check if the backend is running and healthy."""
+        """Check if the backend is running and ready to answer queries."""
         try:
-            # Test with a simple query to check if the backend is responsive
-            test_payload = {
-                "query": "test",
-                "top_k": 1,
-                "metadata_filter": {},
-                "using_tools": False,
-            }
-
-            headers = {
-                "accept": "application/json, text/plain, */*",
-                "content-type": "application/json",
-                "origin": "https://buddhism-chatbot.nguyenvanloc.com",
-                "referer": "https://buddhism-chatbot.nguyenvanloc.com/",
-                "user-agent": "Mozilla/5.0 (compatible; EvaluationBot/1.0)",
-            }
-
-            response = requests.post(
-                f"{self.backend_url}/query",
-                json=test_payload,
-                headers=headers,
-                timeout=30,
-            )
+            # /readyz checks the encoder and the Qdrant collection without
+            # spending an embedding or an LLM call
+            response = requests.get(f"{self.backend_url}/readyz", timeout=10)
 
             if response.status_code == 200:
                 logger.info("Backend is healthy and running")
                 return True
-            else:
-                logger.error(f"Backend health check failed with status: {response.status_code}")
-                return False
+            failed = [
+                f"{check['name']} ({check['detail']})"
+                for check in response.json().get("checks", [])
+                if not check["ok"]
+            ]
+            logger.error(
+                f"Backend health check failed with status: {response.status_code}"
+                + (f", failing checks: {', '.join(failed)}" if failed else ""),
+            )
+            return False
         except Exception as e:
             logger.error(f"Backend health check failed: {e}")
             return False
@@ -0,0 +1,123 @@
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import requests
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from evaluation.benchmarks.common import DEFAULT_QUERIES, percentile_95, save_results
+
+
+@dataclass
+class ConcurrencyResult:
+    """Throughput and latency measured at one concurrency level."""
+
+    concurrency: int
+    total_requests: int
+    failed_requests: int
+    wall_time: float
+    throughput: float
+    p50_latency: float
+    p95_latency: float
+
+
+def send_query(backend_url: str, query: str, top_k: int) -> tuple[float, bool]:
+    """Send one query and return its latency and whether it succeeded."""
+    payload = {
+        "query": query,
+        "top_k": top_k,
+        "metadata_filter": {},
+        "using_tools": False,
+    }
+    start_time = time.perf_counter()
+    try:
+        response = requests.post(f"{backend_url}/query", json=payload, timeout=120)
+        ok = response.status_code == 200
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Query failed: {e}")
+        ok = False
+    return time.perf_counter() - start_time, ok
+
+
+def run_level(
+    backend_url: str,
+    concurrency: int,
+    requests_per_level: int,
+    top_k: int,
+) -> ConcurrencyResult:
+    """Fire requests with a fixed number in flight and measure throughput."""
+    queries = [DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)] for i in range(requests_per_level)]
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(lambda q: send_query(backend_url, q, top_k), queries))
+    wall_time = time.perf_counter() - start_time
+
+    latencies = sorted(latency for latency, _ in outcomes)
+    failed = sum(1 for _, ok in outcomes if not ok)
+    return ConcurrencyResult(
+        concurrency=concurrency,
+        total_requests=len(outcomes),
+        failed_requests=failed,
+        wall_time=wall_time,
+        throughput=len(outcomes) / wall_time,
+        p50_latency=statistics.median(latencies),
+        p95_latency=percentile_95(latencies),
+    )
+
+
+def semantic_cache_enabled(backend_url: str) -> bool:
+    """Check in /status whether the backend serves cached answers."""
+    response = requests.get(f"{backend_url}/status", timeout=30)
+    response.raise_for_status()
+    return response.json().get("semantic_cache") is not None
+
+
+def main() -> int:
+    """Benchmark /query throughput as the number of in-flight requests grows."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark backend concurrency")
+    parser.add_argument("--backend-url", default="http://localhost:8000",
+                        help="Backend URL (default: http://localhost:8000)")
+    parser.add_argument("--levels", default="1,2,4,8,16",
+                        help="Comma-separated numbers of in-flight requests")
+    parser.add_argument("--requests-per-level", type=int, default=32,
+                        help="Number of requests sent at each level")
+    parser.add_argument("--top-k", type=int, default=5, help="top_k sent with each query")
+    parser.add_argument("--output-dir", default="evaluation/results",
+                        help="Output directory for results")
+    parser.add_argument("--allow-semantic-cache", action="store_true",
+                        help="Run even if the backend has its semantic answer cache enabled")
+    args = parser.parse_args()
+
+    # The queries repeat, so with the cache on the run would mostly time cache hits
+    if semantic_cache_enabled(args.backend_url) and not args.allow_semantic_cache:
+        logger.error(
+            "The backend has SEMANTIC_CACHE_ENABLED=true, restart it with the cache off "
+            "or pass --allow-semantic-cache",
+        )
+        return 1
+
+    results = []
+    for level in (int(value) for value in args.levels.split(",")):
+        result = run_level(args.backend_url, level, args.requests_per_level, args.top_k)
+        logger.info(
+            f"concurrency={result.concurrency:>3} "
+            f"throughput={result.throughput:.2f} req/s "
+            f"p50={result.p50_latency:.3f}s p95={result.p95_latency:.3f}s "
+            f"failed={result.failed_requests}",
+        )
+        results.append(result)
+
+    save_results("benchmark_concurrency", [asdict(result) for result in results], args.output_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,135 @@
+import statistics
+import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from loguru import logger
+
+# Add the project root to Python path so we can import backend modules
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.batcher import EmbeddingBatcher, encode_queries
+from backend.config import EMBEDDING_EXECUTOR_WORKERS
+from evaluation.benchmarks.common import DEFAULT_QUERIES, percentile_95, save_results
+
+
+@dataclass
+class BatchWindowResult:
+    """Embedding throughput measured for one batch window."""
+
+    batch_window_ms: float | None
+    clients: int
+    queries: int
+    queries_per_second: float
+    p50_latency: float
+    p95_latency: float
+    mean_batch_size: float
+
+
+def run_clients(embed: Callable[[str], object], clients: int, duration: float) -> list[float]:
+    """Embed queries from ``clients`` closed-loop threads for ``duration`` seconds."""
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(client_id: int) -> None:
+        i = 0
+        while time.perf_counter() < deadline:
+            # Unique queries, so nothing is served from a cache
+            query = f"{DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)]} ({client_id}-{i})"
+            start_time = time.perf_counter()
+            embed(query)
+            with lock:
+                latencies.append(time.perf_counter() - start_time)
+            i += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def summarize(
+    batch_window_ms: float | None,
+    clients: int,
+    duration: float,
+    latencies: list[float],
+    mean_batch_size: float,
+) -> BatchWindowResult:
+    """Summarize the latencies of one run."""
+    result = BatchWindowResult(
+        batch_window_ms=batch_window_ms,
+        clients=clients,
+        queries=len(latencies),
+        queries_per_second=len(latencies) / duration,
+        p50_latency=statistics.median(latencies),
+        p95_latency=percentile_95(latencies),
+        mean_batch_size=mean_batch_size,
+    )
+    window = "unbatched" if batch_window_ms is None else f"{batch_window_ms:g}ms"
+    logger.info(
+        f"window={window:<9} {result.queries_per_second:7.1f} q/s "
+        f"p50={result.p50_latency * 1000:.1f}ms p95={result.p95_latency * 1000:.1f}ms "
+        f"mean batch={result.mean_batch_size:.1f}",
+    )
+    return result
+
+
+def run_benchmark(
+    windows: list[float],
+    clients: int,
+    duration: float,
+    max_batch_size: int,
+) -> list[BatchWindowResult]:
+    """Measure queries/sec without batching and for every batch window."""
+    # Load the model before timing anything
+    encode_queries(["warm-up"])
+
+    # Baseline: one encode per query on the embedding executor threads
+    with ThreadPoolExecutor(max_workers=EMBEDDING_EXECUTOR_WORKERS) as executor:
+        latencies = run_clients(
+            lambda query: executor.submit(encode_queries, [query]).result(),
+            clients,
+            duration,
+        )
+    results = [summarize(None, clients, duration, latencies, 1.0)]
+
+    for window in windows:
+        batcher = EmbeddingBatcher(max_batch_size=max_batch_size, max_wait_ms=window)
+        latencies = run_clients(batcher.embed, clients, duration)
+        batcher.close()
+        results.append(
+            summarize(window, clients, duration, latencies, batcher.stats()["mean_batch_size"]),
+        )
+    return results
+
+
+def main() -> int:
+    """Load test the embedding batcher over several batch windows."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark query embedding micro-batching")
+    parser.add_argument("--windows", default="0,1,2,5,10,20",
+                        help="Comma-separated batch windows in milliseconds")
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per window")
+    parser.add_argument("--max-batch-size", type=int, default=32, help="Largest batch")
+    parser.add_argument("--output-dir", default="evaluation/results",
+                        help="Output directory for results")
+    args = parser.parse_args()
+
+    windows = [float(window) for window in args.windows.split(",")]
+    results = run_benchmark(windows, args.clients, args.duration, args.max_batch_size)
+
+    save_results("benchmark_embedding_batcher", [asdict(result) for result in results], args.output_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
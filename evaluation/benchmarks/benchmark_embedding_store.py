@@ -0,0 +1,120 @@
+import json
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+# Add the project root to Python path so we can import project modules
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from embedding.store import EmbeddingStore
+from evaluation.benchmarks.common import save_results
+
+
+@dataclass
+class FormatResult:
+    """Size and timings of one embedding file format."""
+
+    format: str
+    rows: int
+    bytes: int
+    write_seconds: float
+    load_seconds: float
+
+
+def make_corpus(rows: int, dim: int, seed: int) -> tuple[list[dict], np.ndarray]:
+    """Build synthetic records shaped like the embedder's output."""
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((rows, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    records = [
+        {
+            "id": f"document#{i}",
+            "text": "Đế Quân nói rằng: ta trải qua mười bảy đời làm kẻ sĩ. " * 8,
+            "metadata": {"title": "An Sĩ Toàn Thư", "page_id": f"RBI_002.001.{i % 500:03d}"},
+        }
+        for i in range(rows)
+    ]
+    return records, vectors
+
+
+def measure_jsonl(directory: Path, records: list[dict], vectors: np.ndarray) -> FormatResult:
+    """Write and read back JSONL records with inline float lists."""
+    path = directory / "embedded_chunks.jsonl"
+    start_time = time.perf_counter()
+    with path.open("w", encoding="utf-8") as f:
+        for record, vector in zip(records, vectors, strict=True):
+            f.write(json.dumps({**record, "embedding": vector.tolist()}, ensure_ascii=False) + "\n")
+    write_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    with path.open(encoding="utf-8") as f:
+        loaded = [json.loads(line) for line in f]
+    matrix = np.array([record["embedding"] for record in loaded], dtype=np.float32)
+    load_seconds = time.perf_counter() - start_time
+
+    return FormatResult("jsonl", len(matrix), path.stat().st_size, write_seconds, load_seconds)
+
+
+def measure_store(directory: Path, records: list[dict], vectors: np.ndarray) -> FormatResult:
+    """Write and read back an embedding store."""
+    start_time = time.perf_counter()
+    store = EmbeddingStore.create(directory / "store", dim=vectors.shape[1], model="synthetic")
+    store.append(records, vectors)
+    write_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    store = EmbeddingStore.open(directory / "store")
+    loaded = list(store.records())
+    # Touch every page, a memory map alone reads nothing
+    matrix = np.array(store.vectors())
+    load_seconds = time.perf_counter() - start_time
+
+    size = sum(path.stat().st_size for path in store.path.iterdir())
+    return FormatResult("store", min(len(matrix), len(loaded)), size, write_seconds, load_seconds)
+
+
+def main() -> int:
+    """Compare disk footprint and load time of the JSONL and store formats."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the embedding store format")
+    parser.add_argument("--rows", type=int, default=20000, help="Synthetic records to write")
+    parser.add_argument("--dim", type=int, default=768, help="Embedding dimension")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--output-dir", default="evaluation/results",
+                        help="Output directory for results")
+    args = parser.parse_args()
+
+    records, vectors = make_corpus(args.rows, args.dim, args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        results = [
+            measure_jsonl(Path(directory), records, vectors),
+            measure_store(Path(directory), records, vectors),
+        ]
+
+    for result in results:
+        logger.info(
+            f"{result.format:<5} size={result.bytes / 1024**2:.1f} MiB "
+            f"write={result.write_seconds:.2f}s load={result.load_seconds:.2f}s",
+        )
+    jsonl, store = results
+    logger.info(
+        f"The store is {jsonl.bytes / store.bytes:.1f}x smaller and loads "
+        f"{jsonl.load_seconds / store.load_seconds:.1f}x faster",
+    )
+
+    save_results(
+        "benchmark_embedding_store",
+        {"dim": args.dim, "results": [asdict(result) for result in results]},
+        args.output_dir,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,172 @@
+import json
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+# Add the project root to Python path so we can import backend modules
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import EMBEDDING_MODEL_NAME
+from backend.encoder import model_registry
+from evaluation.benchmarks.common import DEFAULT_QUERIES, percentile_95, save_results
+
+CORPUS_PATH = Path("jsonl/cleaned")
+
+
+@dataclass
+class EncoderResult:
+    """Latency and memory of one encoder backend."""
+
+    backend: str
+    load_seconds: float
+    parameter_bytes: int
+    rss_delta_bytes: int | None
+    query_p50_latency: float
+    query_p95_latency: float
+    batch_texts_per_second: float
+
+
+@dataclass
+class ParityResult:
+    """Agreement between the ONNX and torch embeddings of the same texts."""
+
+    texts: int
+    mean_cosine: float
+    min_cosine: float
+    p1_cosine: float
+    top10_overlap: float
+
+
+def load_corpus(sample_size: int, seed: int) -> list[str]:
+    """Sample sentences from the cleaned corpus."""
+    texts = []
+    for path in sorted(CORPUS_PATH.glob("*.jsonl")):
+        with path.open(encoding="utf-8") as f:
+            texts.extend(json.loads(line)["text"] for line in f if line.strip())
+    texts = [text for text in texts if text.strip()]
+    order = np.random.default_rng(seed).permutation(len(texts))
+    return [texts[i] for i in order[:sample_size]]
+
+
+def encode(model: object, texts: list[str], batch_size: int = 32) -> np.ndarray:
+    """Encode texts into normalized float32 embeddings."""
+    return model.encode(
+        texts,
+        batch_size=batch_size,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+    ).astype(np.float32)
+
+
+def measure_backend(backend: str, texts: list[str], queries: int) -> tuple[EncoderResult, np.ndarray]:
+    """Load one backend, time single queries and a batch pass over ``texts``."""
+    model = model_registry.get(EMBEDDING_MODEL_NAME, device="cpu", backend=backend)
+    status = next(
+        loaded for loaded in model_registry.status()
+        if loaded["backend"] == backend and loaded["device"] == "cpu"
+    )
+
+    latencies = []
+    for i in range(queries):
+        query = DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)]
+        start_time = time.perf_counter()
+        model.encode(query, normalize_embeddings=True, convert_to_numpy=True)
+        latencies.append(time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    embeddings = encode(model, texts)
+    batch_seconds = time.perf_counter() - start_time
+
+    result = EncoderResult(
+        backend=backend,
+        load_seconds=status["load_seconds"],
+        parameter_bytes=status["parameter_bytes"],
+        rss_delta_bytes=status["rss_delta_bytes"],
+        query_p50_latency=statistics.median(latencies),
+        query_p95_latency=percentile_95(latencies),
+        batch_texts_per_second=len(texts) / batch_seconds,
+    )
+    rss = f"{result.rss_delta_bytes / 1024**2:.0f} MiB" if result.rss_delta_bytes is not None else "n/a"
+    logger.info(
+        f"{backend:<5} load={result.load_seconds:.1f}s weights={result.parameter_bytes / 1024**2:.0f} MiB "
+        f"rss={rss} query p50={result.query_p50_latency * 1000:.1f}ms "
+        f"p95={result.query_p95_latency * 1000:.1f}ms batch={result.batch_texts_per_second:.1f} texts/s",
+    )
+    return result, embeddings
+
+
+def compare(onnx_embeddings: np.ndarray, torch_embeddings: np.ndarray) -> ParityResult:
+    """Compare the embeddings and the nearest neighbours they produce."""
+    cosines = np.sum(onnx_embeddings * torch_embeddings, axis=1)
+
+    # Use the first texts as queries against the whole sample
+    queries = min(100, len(onnx_embeddings))
+    k = min(10, len(onnx_embeddings))
+    onnx_top = np.argsort(-(onnx_embeddings[:queries] @ onnx_embeddings.T), axis=1)[:, :k]
+    torch_top = np.argsort(-(torch_embeddings[:queries] @ torch_embeddings.T), axis=1)[:, :k]
+    overlap = np.mean([
+        len(set(onnx_row) & set(torch_row)) / k
+        for onnx_row, torch_row in zip(onnx_top, torch_top, strict=True)
+    ])
+
+    result = ParityResult(
+        texts=len(cosines),
+        mean_cosine=float(cosines.mean()),
+        min_cosine=float(cosines.min()),
+        p1_cosine=float(np.percentile(cosines, 1)),
+        top10_overlap=float(overlap),
+    )
+    logger.info(
+        f"Parity over {result.texts} texts: mean cosine={result.mean_cosine:.4f} "
+        f"min={result.min_cosine:.4f} p1={result.p1_cosine:.4f} top-10 overlap={result.top10_overlap:.3f}",
+    )
+    return result
+
+
+def main() -> int:
+    """Check ONNX/torch parity on the corpus and compare latency and memory."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the ONNX encoder backend")
+    parser.add_argument("--sample-size", type=int, default=2000, help="Corpus sentences to embed")
+    parser.add_argument("--queries", type=int, default=200, help="Single-query encodes to time")
+    parser.add_argument("--min-mean-cosine", type=float, default=0.99,
+                        help="Fail when the mean cosine similarity is lower")
+    parser.add_argument("--min-cosine", type=float, default=0.95,
+                        help="Fail when any cosine similarity is lower")
+    parser.add_argument("--seed", type=int, default=42, help="Sampling seed")
+    parser.add_argument("--output-dir", default="evaluation/results",
+                        help="Output directory for results")
+    args = parser.parse_args()
+
+    texts = load_corpus(args.sample_size, args.seed)
+    logger.info(f"Sampled {len(texts)} sentences from {CORPUS_PATH}")
+
+    # ONNX first, so its memory delta does not include the torch runtime warm-up
+    onnx_result, onnx_embeddings = measure_backend("onnx", texts, args.queries)
+    torch_result, torch_embeddings = measure_backend("torch", texts, args.queries)
+    parity = compare(onnx_embeddings, torch_embeddings)
+
+    save_results(
+        "benchmark_onnx_encoder",
+        {
+            "model": EMBEDDING_MODEL_NAME,
+            "encoders": [asdict(onnx_result), asdict(torch_result)],
+            "parity": asdict(parity),
+        },
+        args.output_dir,
+    )
+
+    if parity.mean_cosine < args.min_mean_cosine or parity.min_cosine < args.min_cosine:
+        logger.error("ONNX embeddings disagree with the torch model")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,143 @@
+import statistics
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from loguru import logger
+from qdrant_client.models import PayloadSchemaType
+
+# Add the project root to Python path so we can import backend modules
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import COLLECTION_NAME
+from backend.constants import BOOK_ID_MAP, ENTITY_TYPES, Title, Volume
+from backend.qdrant_pool import qdrant_pool
+from backend.rag import build_filter, embed_queries
+from evaluation.benchmarks.common import DEFAULT_QUERIES, percentile_95, save_results
+
+
+@dataclass
+class FilterResult:
+    """Search latency with one metadata filter."""
+
+    name: str
+    metadata_filter: dict
+    indexed: bool
+    searches: int
+    mean_hits: float
+    p50_latency: float
+    p95_latency: float
+
+
+def most_common_entities(sample_size: int) -> dict[str, str]:
+    """Return the most frequent value of every entity type in a payload sample."""
+    points, _ = qdrant_pool.client.scroll(
+        COLLECTION_NAME,
+        limit=sample_size,
+        with_payload=[f"entities_{entity_type}" for entity_type in ENTITY_TYPES],
+        with_vectors=False,
+    )
+    counts: dict[str, Counter] = {}
+    for point in points:
+        for key, values in (point.payload or {}).items():
+            counts.setdefault(key, Counter()).update(values)
+    return {key: counter.most_common(1)[0][0] for key, counter in counts.items() if counter}
+
+
+def run_filter(
+    name: str,
+    metadata_filter: dict,
+    vectors: list,
+    repeats: int,
+    top_k: int,
+    indexed_fields: set[str],
+) -> FilterResult:
+    """Time ``repeats`` searches per query vector with one filter."""
+    query_filter = build_filter(metadata_filter)
+    latencies, hits = [], []
+    for _ in range(repeats):
+        for vector in vectors:
+            start_time = time.perf_counter()
+            response = qdrant_pool.client.query_points(
+                collection_name=COLLECTION_NAME,
+                query=vector,
+                limit=top_k,
+                query_filter=query_filter,
+                with_payload=False,
+            )
+            latencies.append(time.perf_counter() - start_time)
+            hits.append(len(response.points))
+
+    result = FilterResult(
+        name=name,
+        metadata_filter=metadata_filter,
+        indexed=all(key in indexed_fields for key in metadata_filter),
+        searches=len(latencies),
+        mean_hits=statistics.mean(hits),
+        p50_latency=statistics.median(latencies),
+        p95_latency=percentile_95(latencies),
+    )
+    logger.info(
+        f"{name:<18} indexed={result.indexed!s:<5} hits={result.mean_hits:.1f} "
+        f"p50={result.p50_latency * 1000:.2f}ms p95={result.p95_latency * 1000:.2f}ms",
+    )
+    return result
+
+
+def main() -> int:
+    """Compare unfiltered search latency with each filtered search."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark filtered vs. unfiltered Qdrant search")
+    parser.add_argument("--repeats", type=int, default=20, help="Searches per query and filter")
+    parser.add_argument("--top-k", type=int, default=5, help="Results per search")
+    parser.add_argument("--entity-sample", type=int, default=2000,
+                        help="Points scanned to pick the entity filter values")
+    parser.add_argument("--output-dir", default="evaluation/results",
+                        help="Output directory for results")
+    args = parser.parse_args()
+
+    info = qdrant_pool.client.get_collection(COLLECTION_NAME)
+    indexed_fields = {
+        field for field, schema in (info.payload_schema or {}).items()
+        if schema.data_type == PayloadSchemaType.KEYWORD
+    }
+    logger.info(
+        f"Collection '{COLLECTION_NAME}' has {info.points_count} points, "
+        f"keyword indexes: {', '.join(sorted(indexed_fields)) or 'none'}",
+    )
+
+    filters = {
+        "unfiltered": {},
+        "title": {"title": Title.AN_SI_TOAN_THU.value},
+        "volume": {"volume": Volume.AN_SI_TOAN_THU_QUYEN_I.value},
+        "book_id": {"book_id": next(iter(BOOK_ID_MAP))},
+    }
+    for key, value in most_common_entities(args.entity_sample).items():
+        filters[key] = {key: value}
+
+    vectors = embed_queries(DEFAULT_QUERIES)
+    # One untimed search so connection setup does not count
+    qdrant_pool.client.query_points(collection_name=COLLECTION_NAME, query=vectors[0], limit=1)
+    results = [
+        run_filter(name, metadata_filter, vectors, args.repeats, args.top_k, indexed_fields)
+        for name, metadata_filter in filters.items()
+    ]
+
+    save_results(
+        "benchmark_payload_filters",
+        {
+            "collection": COLLECTION_NAME,
+            "points": info.points_count,
+            "indexed_fields": sorted(indexed_fields),
+            "results": [asdict(result) for result in results],
+        },
+        args.output_dir,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,157 @@
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+# Add the project root to Python path so we can import backend modules
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import RERANK_CANDIDATES
+from backend.lexical import TOKEN_PATTERN
+from backend.rag import embed_queries, query_qdrant
+from backend.reranker import reranker
+from evaluation.benchmarks.common import percentile_95, save_results
+
+
+@dataclass
+class RerankResult:
+    """Recall and added latency of one configuration.
+
+    ``budget_ms`` is None for the retrieval order without reranking.
+    """
+
+    name: str
+    budget_ms: float | None
+    recall_at_k: dict[str, float]
+    p50_latency: float
+    p95_latency: float
+    truncated_ratio: float
+
+
+def load_test_set(dataset_name: str, max_queries: int, min_answer_tokens: int, seed: int) -> list[dict]:
+    """Sample question/answer pairs whose answer is long enough to look up."""
+    from datasets import load_dataset
+
+    rows = [
+        {"question": row["question"], "answer": row["answer"]}
+        for row in load_dataset(dataset_name)["train"]
+        if len(TOKEN_PATTERN.findall(row["answer"].lower())) >= min_answer_tokens
+    ]
+    order = np.random.default_rng(seed).permutation(len(rows))
+    return [rows[i] for i in order[:max_queries]]
+
+
+def supports(passage: dict, answer: str, threshold: float) -> bool:
+    """Check whether a passage contains most of the answer's syllables.
+
+    The test set has no passage labels, so a passage counts as relevant when
+    at least ``threshold`` of the answer's syllables occur in it.
+    """
+    answer_tokens = set(TOKEN_PATTERN.findall(answer.lower()))
+    passage_tokens = set(TOKEN_PATTERN.findall(passage["text"].lower()))
+    return len(answer_tokens & passage_tokens) / len(answer_tokens) >= threshold
+
+
+def recall_at_k(rankings: list[list[bool]], ks: list[int]) -> dict[str, float]:
+    """Fraction of queries with a relevant passage among the first k."""
+    return {f"@{k}": float(np.mean([any(ranking[:k]) for ranking in rankings])) for k in ks}
+
+
+def main() -> int:
+    """Compare recall@k with and without reranking and the latency it adds."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the cross-encoder reranking stage")
+    parser.add_argument("--dataset", default="vanloc1808/buddhist-scholar-test-set", help="HuggingFace dataset name")
+    parser.add_argument("--max-queries", type=int, default=200, help="Test questions to evaluate")
+    parser.add_argument("--candidates", type=int, default=RERANK_CANDIDATES, help="Passages retrieved per question")
+    parser.add_argument("--ks", default="1,3,5,10", help="Comma separated cut-offs for recall@k")
+    parser.add_argument("--budgets", default="50,100,300,inf",
+                        help="Comma separated reranking budgets in milliseconds")
+    parser.add_argument("--support-threshold", type=float, default=0.8,
+                        help="Share of answer syllables a relevant passage must contain")
+    parser.add_argument("--min-answer-tokens", type=int, default=3, help="Skip answers with fewer syllables")
+    parser.add_argument("--seed", type=int, default=42, help="Sampling seed")
+    parser.add_argument("--output-dir", default="evaluation/results",
+                        help="Output directory for results")
+    args = parser.parse_args()
+
+    ks = [int(k) for k in args.ks.split(",")]
+    budgets = [float(budget) for budget in args.budgets.split(",")]
+
+    test_set = load_test_set(args.dataset, args.max_queries, args.min_answer_tokens, args.seed)
+    logger.info(f"Evaluating {len(test_set)} questions from {args.dataset}")
+
+    vectors = embed_queries([row["question"] for row in test_set])
+    candidates = [
+        query_qdrant(row["question"], top_k=args.candidates, query_vector=vector)
+        for row, vector in zip(test_set, vectors, strict=True)
+    ]
+    relevance = [
+        [supports(passage, row["answer"], args.support_threshold) for passage in passages]
+        for row, passages in zip(test_set, candidates, strict=True)
+    ]
+    candidate_recall = float(np.mean([any(ranking) for ranking in relevance]))
+    logger.info(
+        f"A relevant passage is among the {args.candidates} candidates for {candidate_recall:.1%} of questions",
+    )
+
+    results = [
+        RerankResult(
+            name="retrieval",
+            budget_ms=None,
+            recall_at_k=recall_at_k(relevance, ks),
+            p50_latency=0.0,
+            p95_latency=0.0,
+            truncated_ratio=0.0,
+        ),
+    ]
+
+    # Load the model outside of the timed calls
+    reranker.model  # noqa: B018
+    for budget in budgets:
+        latencies, rankings = [], []
+        truncated_before = reranker.stats()["truncated"]
+        for row, passages in zip(test_set, candidates, strict=True):
+            start_time = time.perf_counter()
+            reranked = reranker.rerank(row["question"], passages, top_k=max(ks), budget_ms=budget)
+            latencies.append(time.perf_counter() - start_time)
+            rankings.append([supports(passage, row["answer"], args.support_threshold) for passage in reranked])
+        results.append(
+            RerankResult(
+                name=f"rerank ({budget:g}ms)",
+                budget_ms=budget if budget != float("inf") else None,
+                recall_at_k=recall_at_k(rankings, ks),
+                p50_latency=statistics.median(latencies),
+                p95_latency=percentile_95(latencies),
+                truncated_ratio=(reranker.stats()["truncated"] - truncated_before) / len(test_set),
+            ),
+        )
+
+    for result in results:
+        recall = " ".join(f"R{k}={value:.3f}" for k, value in result.recall_at_k.items())
+        logger.info(
+            f"{result.name:<18} {recall} added p50={result.p50_latency * 1000:.1f}ms "
+            f"p95={result.p95_latency * 1000:.1f}ms truncated={result.truncated_ratio:.1%}",
+        )
+
+    save_results(
+        "benchmark_rerank",
+        {
+            "model": reranker.model_name,
+            "questions": len(test_set),
+            "candidates": args.candidates,
+            "candidate_recall": candidate_recall,
+            "results": [asdict(result) for result in results],
+        },
+        args.output_dir,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,93 @@
+import asyncio
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from loguru import logger
+
+# Add the project root to Python path so we can import backend modules
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.llm.executors import LocalToolExecutor, MCPToolExecutor, ToolExecutor
+from backend.llm.mcp_pool import MCPSessionPool
+from evaluation.benchmarks.common import DEFAULT_QUERIES, percentile_95, save_results
+
+
+@dataclass
+class ToolModeResult:
+    """Per-turn tool latency measured for one execution mode."""
+
+    mode: str
+    turns: int
+    startup_time: float
+    mean_latency: float
+    p50_latency: float
+    p95_latency: float
+
+
+async def run_mode(executor: ToolExecutor, turns: int) -> ToolModeResult:
+    """Time ``turns`` retrieve_text calls through one executor."""
+    start_time = time.perf_counter()
+    await executor.start()
+    startup_time = time.perf_counter() - start_time
+
+    latencies = []
+    try:
+        for i in range(turns):
+            # Vary the query suffix so the embedding cache does not hide the encoder cost
+            query = f"{DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)]} ({i})"
+            start_time = time.perf_counter()
+            await executor.call("retrieve_text", {"query": query})
+            latencies.append(time.perf_counter() - start_time)
+    finally:
+        await executor.close()
+
+    return ToolModeResult(
+        mode=executor.mode,
+        turns=turns,
+        startup_time=startup_time,
+        mean_latency=statistics.mean(latencies),
+        p50_latency=statistics.median(latencies),
+        p95_latency=percentile_95(latencies),
+    )
+
+
+async def run_benchmark(turns: int, mcp_pool_size: int) -> list[ToolModeResult]:
+    """Benchmark the in-process and MCP tool execution modes."""
+    executors = [
+        LocalToolExecutor(),
+        MCPToolExecutor(MCPSessionPool(size=mcp_pool_size)),
+    ]
+    results = []
+    for executor in executors:
+        result = await run_mode(executor, turns)
+        logger.info(
+            f"mode={result.mode:<5} startup={result.startup_time:.2f}s "
+            f"mean={result.mean_latency * 1000:.1f}ms "
+            f"p50={result.p50_latency * 1000:.1f}ms p95={result.p95_latency * 1000:.1f}ms",
+        )
+        results.append(result)
+    return results
+
+
+def main() -> int:
+    """Compare the per-turn latency of local and MCP tool execution."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark tool execution modes")
+    parser.add_argument("--turns", type=int, default=50, help="Tool calls per mode")
+    parser.add_argument("--mcp-pool-size", type=int, default=1, help="MCP sessions to open")
+    parser.add_argument("--output-dir", default="evaluation/results",
+                        help="Output directory for results")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.turns, args.mcp_pool_size))
+
+    save_results("benchmark_tool_modes", [asdict(result) for result in results], args.output_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
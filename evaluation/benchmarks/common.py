@@ -0,0 +1,30 @@
+import json
+import statistics
+from datetime import datetime
+from pathlib import Path
+
+from loguru import logger
+
+DEFAULT_QUERIES = [
+    "Đế Quân dạy điều gì về nhân quả?",
+    "Vì sao nên kiêng sát sinh?",
+    "Niệm Phật có lợi ích gì?",
+    "Quan Âm Thị Kính kể về ai?",
+    "Thiền Uyển Tập Anh ghi chép những gì?",
+]
+
+
+def percentile_95(values: list[float]) -> float:
+    """Return the 95th percentile of ``values``."""
+    return statistics.quantiles(values, n=20)[18] if len(values) > 1 else values[0]
+
+
+def save_results(name: str, data: dict | list, output_dir: str | Path) -> Path:
+    """Write benchmark results to a timestamped JSON file and return its path."""
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = Path(output_dir) / f"{name}_{timestamp}.json"
+    with output_file.open("w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    logger.info(f"Results saved to {output_file}")
+    return output_file
@@ -1,6 +1,7 @@
 import asyncio
 import json
 import os
+import sys
 from datetime import datetime
 from pathlib import Path
 
@@ -9,9 +10,14 @@ from bert_score import score
 from dotenv import load_dotenv
 from loguru import logger
 from openai import AsyncOpenAI
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 
+# Add the project root to Python path so we can import backend modules
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import get_device
+from backend.encoder import model_registry
+
 load_dotenv()
 
 # Initialize logging
@@ -30,7 +36,8 @@ SYSTEM_PROMPT = (
 
 # Initialize models
 openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
-sentence_model = SentenceTransformer("intfloat/e5-base")
+# Always the torch model, so the scores do not depend on EMBEDDING_BACKEND
+sentence_model = model_registry.get("intfloat/e5-base", device=get_device(), backend="torch")
 
 
 class AnswerEvaluator:
@@ -1,28 +1,53 @@
 'use client';
 
-import { useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import QueryForm from '@/components/QueryForm';
 import QueryResults from '@/components/QueryResults';
-import { queryBackend } from '@/lib/api';
+import { streamQuery } from '@/lib/api';
 import { QueryRequest, QueryResponse } from '@/types/api';
 
 export default function Home() {
     const [results, setResults] = useState<QueryResponse | null>(null);
     const [isLoading, setIsLoading] = useState(false);
     const [error, setError] = useState<string | null>(null);
+    const abortControllerRef = useRef<AbortController | null>(null);
+
+    // Cancel any in-flight stream when the page unmounts
+    useEffect(() => () => abortControllerRef.current?.abort(), []);
 
     const handleQuery = async (request: QueryRequest) => {
+        abortControllerRef.current?.abort();
+        const abortController = new AbortController();
+        abortControllerRef.current = abortController;
+
         setIsLoading(true);
         setError(null);
+        setResults(null);
 
         try {
-            const response = await queryBackend(request);
-            setResults(response);
+            await streamQuery(
+                request,
+                {
+                    onCitations: (relevantTexts) => {
+                        setResults({ answer: '', relevant_texts: relevantTexts });
+                        setIsLoading(false);
+                    },
+                    onToken: (content) => {
+                        setResults((previous) => previous && { ...previous, answer: previous.answer + content });
+                    },
+                },
+                abortController.signal,
+            );
         } catch (err) {
+            if (abortController.signal.aborted) {
+                return;
+            }
             console.error('Query failed:', err);
             setError('Failed to get response. Please check if the backend is running and try again.');
         } finally {
-            setIsLoading(false);
+            if (abortControllerRef.current === abortController) {
+                setIsLoading(false);
+            }
         }
     };
 
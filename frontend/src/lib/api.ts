@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { QueryRequest, QueryResponse, BooksResponse } from '@/types/api';
+import { QueryRequest, QueryResponse, BooksResponse, RelevantText } from '@/types/api';
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
@@ -20,6 +20,68 @@ export const queryBackend = async (request: QueryRequest): Promise<QueryResponse
     return response.data;
 };
 
+export interface StreamHandlers {
+    onCitations: (relevantTexts: RelevantText[]) => void;
+    onToken: (content: string) => void;
+}
+
+export const streamQuery = async (
+    request: QueryRequest,
+    handlers: StreamHandlers,
+    signal?: AbortSignal,
+): Promise<void> => {
+    const response = await fetch(`${API_BASE_URL}/query/stream`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            Accept: 'text/event-stream',
+        },
+        body: JSON.stringify(request),
+        signal,
+    });
+    if (!response.ok || !response.body) {
+        throw new Error(`Streaming query failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) {
+            return;
+        }
+        buffer += decoder.decode(value, { stream: true });
+
+        let separator = buffer.indexOf('\n\n');
+        while (separator !== -1) {
+            const rawEvent = buffer.slice(0, separator);
+            buffer = buffer.slice(separator + 2);
+            separator = buffer.indexOf('\n\n');
+
+            let event = 'message';
+            let data = '';
+            for (const line of rawEvent.split('\n')) {
+                if (line.startsWith('event: ')) {
+                    event = line.slice('event: '.length);
+                } else if (line.startsWith('data: ')) {
+                    data += line.slice('data: '.length);
+                }
+            }
+
+            if (event === 'citations') {
+                handlers.onCitations(JSON.parse(data));
+            } else if (event === 'token') {
+                handlers.onToken(JSON.parse(data).content);
+            } else if (event === 'error') {
+                throw new Error(JSON.parse(data).message);
+            } else if (event === 'done') {
+                return;
+            }
+        }
+    }
+};
+
 export const fetchBooks = async (): Promise<BooksResponse> => {
     const response = await apiClient.get('/books');
     return response.data;
@@ -1,14 +1,45 @@
+import hashlib
 import json
 import os
+import queue
+import random
+import sys
+import threading
+import time
 import uuid
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from functools import partial
+from itertools import chain, islice
 from pathlib import Path
+from typing import Any
 
+import numpy as np
 from dotenv import load_dotenv
 from loguru import logger
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, PointStruct, VectorParams
+from qdrant_client.http.exceptions import (
+    ResponseHandlingException,
+    UnexpectedResponse,
+)
+from qdrant_client.models import (
+    Distance,
+    FieldCondition,
+    Filter,
+    MatchValue,
+    PayloadSchemaType,
+    PointIdsList,
+    PointStruct,
+    VectorParams,
+)
 from tqdm import tqdm
 
+# Add the project root to Python path so we can import backend modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.constants import KEYWORD_INDEX_FIELDS, split_page_id
+from embedding.store import EmbeddingStore
+
 load_dotenv()
 
 # Qdrant configuration
@@ -19,7 +50,19 @@ EMBEDDING_DIM = int(
     os.getenv("EMBEDDING_DIM", 768),
 )  # match the embedding model intfloat/multilingual-e5-base
 BATCH_SIZE = 256
+# Concurrent upsert workers, each with at most two batches queued ahead
+UPLOAD_WORKERS = int(os.getenv("QDRANT_UPLOAD_WORKERS", "4"))
+# Failed requests are retried with exponential backoff starting at
+# UPLOAD_RETRY_DELAY seconds
+UPLOAD_MAX_RETRIES = int(os.getenv("QDRANT_UPLOAD_MAX_RETRIES", "5"))
+UPLOAD_RETRY_DELAY = float(os.getenv("QDRANT_UPLOAD_RETRY_DELAY", "0.5"))
 BASE_JSONL_EMBEDDINGS_DIR = Path("./jsonl/embeddings")
+EMBEDDING_STORE_PATH = BASE_JSONL_EMBEDDINGS_DIR / "store"
+# Namespace of the deterministic point IDs, changing it re-uploads everything
+POINT_ID_NAMESPACE = uuid.uuid5(
+    uuid.NAMESPACE_URL,
+    "https://github.com/hcmus-project-collection/buddhism-chatbot",
+)
 
 
 def connect_to_qdrant() -> QdrantClient:
@@ -54,12 +97,45 @@ def create_collection(
                 f"Collection '{collection_name}' already exists or "
                 f"could not be created: {e}",
             )
+    create_payload_indexes(client, collection_name)
+
+
+def create_payload_indexes(
+    client: QdrantClient,
+    collection_name: str,
+    fields: list[str] = KEYWORD_INDEX_FIELDS,
+) -> None:
+    """Create a keyword payload index for every field used in filters.
+
+    Without an index, filtered searches check the payload of every
+    candidate. Creating an index that already exists is a no-op.
+    """
+    for field in fields:
+        client.create_payload_index(
+            collection_name,
+            field_name=field,
+            field_schema=PayloadSchemaType.KEYWORD,
+            wait=True,
+        )
+    logger.info(
+        f"Keyword payload indexes on '{collection_name}': {', '.join(fields)}",
+    )
 
 
 def flatten_entities(meta: dict) -> dict:
-    """Flatten NER entity types for filtering."""
+    """Flatten NER entity types for filtering.
+
+    Entities come either as a list of ``{"type", "text"}`` objects or, as
+    in the NER JSONL files, as a mapping from type to texts.
+    """
     flat = {}
     entities = meta.get("entities", [])
+    if isinstance(entities, dict):
+        entities = [
+            {"type": ent_type, "text": ent_text}
+            for ent_type, ent_texts in entities.items()
+            for ent_text in ent_texts
+        ]
     for ent in entities:
         ent_type = ent.get("type")
         ent_text = ent.get("text")
@@ -69,64 +145,393 @@ def flatten_entities(meta: dict) -> dict:
     return flat
 
 
-def load_points_from_jsonl(file_path: str | Path) -> list[PointStruct]:
-    """Load points from a JSONL file and enrich metadata."""
-    points = []
+def content_hash(text: str, payload: dict, vector: list[float] | np.ndarray) -> str:
+    """Hash the text, payload and vector of a record.
+
+    The vector is part of the hash, so re-embedding with another model,
+    backend or quantization changes the point IDs and replaces the points.
+    """
+    content = json.dumps(
+        {"text": text, "payload": payload},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    digest = hashlib.sha256(content.encode("utf-8"))
+    digest.update(np.asarray(vector, dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+
+def point_id(record_id: str, digest: str) -> str:
+    """Derive a stable point ID from the record ID and its content hash.
+
+    Re-uploading an unchanged record yields the same ID, an edited or
+    re-embedded record yields a new one.
+    """
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{record_id}:{digest}"))
+
+
+def to_point(
+    data: dict,
+    vector: list[float] | np.ndarray,
+    fallback_id: str,
+) -> PointStruct:
+    """Build a point from an embedding record and enrich its metadata."""
+    metadata = data.get("metadata") or data.get("meta", {})
+    page_id = metadata["page_id"]
+    # Extract structured metadata from page_id
+    parts = split_page_id(page_id)
+    if parts is None:
+        logger.warning(f"Malformed page_id: {page_id}")
+    book_id, chapter_id, page = parts or (None, None, None)
+
+    # Embedding records keep their metadata under "metadata", the NER
+    # JSONL files under "meta"
+    payload = {
+        **{
+            key: value
+            for key, value in metadata.items()
+            if key != "entities"
+        },
+        **flatten_entities(metadata),
+        "text": data["text"],
+        "page_id": page_id,
+        "book_id": book_id,
+        "chapter_id": chapter_id,
+        "page": page,
+    }
+    record_id = data.get("id") or fallback_id
+    digest = content_hash(data["text"], payload, vector)
+    payload["source_id"] = record_id
+    payload["content_hash"] = digest
+
+    return PointStruct(
+        id=point_id(record_id, digest),
+        vector=vector.tolist() if isinstance(vector, np.ndarray) else vector,
+        payload=payload,
+    )
+
+
+def iter_points_from_jsonl(file_path: str | Path) -> Iterator[PointStruct]:
+    """Read points one at a time from a JSONL file with inline embeddings."""
     if isinstance(file_path, str):
         file_path = Path(file_path)
     with file_path.open("r", encoding="utf-8") as f:
-        for line in tqdm(f, desc=f"Loading points from {file_path.name}"):
+        for line_number, line in enumerate(
+            tqdm(f, desc=f"Loading points from {file_path.name}"),
+        ):
             data = json.loads(line)
-            page_id = data["metadata"]["page_id"]
-            # Extract structured metadata from sentence_id
-            try:
-                book_id, chapter_id, page = page_id.split(".")
-            except ValueError:
-                book_id = chapter_id = page = None
-                logger.warning(f"Malformed page_id: {page_id}")
-
-            payload = {
-                "text": data["text"],
-                "page_id": page_id,
-                "book_id": book_id,
-                "chapter_id": chapter_id,
-                "page": page,
-                **data.get("meta", {}),
-            }
-
-            point = PointStruct(
-                id=uuid.uuid4().hex,  # Generate a unique ID for each point
-                vector=data["embedding"],
-                payload=payload,
+            yield to_point(
+                data,
+                data["embedding"],
+                fallback_id=f"{file_path.stem}:{line_number}",
             )
-            points.append(point)
-    logger.info(f"Loaded {len(points)} points from {file_path.name}")
+
+
+def iter_points_from_store(store_path: str | Path) -> Iterator[PointStruct]:
+    """Read points one at a time from an embedding store.
+
+    The vectors are read straight from the memory-mapped matrix.
+    """
+    store = EmbeddingStore.open(store_path)
+    for row, (data, vector) in enumerate(
+        tqdm(store, total=len(store), desc=f"Loading points from {store.path}"),
+    ):
+        yield to_point(data, vector, fallback_id=f"{store.path.name}:{row}")
+
+
+def load_points_from_jsonl(file_path: str | Path) -> list[PointStruct]:
+    """Load all points of a JSONL file into memory."""
+    points = list(iter_points_from_jsonl(file_path))
+    logger.info(f"Loaded {len(points)} points from {Path(file_path).name}")
     return points
 
 
+def is_retryable(error: Exception) -> bool:
+    """Check whether a failed Qdrant request is worth retrying."""
+    if isinstance(error, ResponseHandlingException):
+        # Connection errors and timeouts
+        return True
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def with_retries(
+    operation: Callable[[], Any],
+    description: str,
+    max_retries: int = UPLOAD_MAX_RETRIES,
+    retry_delay: float = UPLOAD_RETRY_DELAY,
+) -> Any:
+    """Run a Qdrant request, retrying transient failures with backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            return operation()
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            # Exponential backoff with jitter, so workers do not retry in step
+            delay = retry_delay * 2**attempt * random.uniform(0.5, 1.5)  # noqa: S311
+            logger.warning(
+                f"{description} failed ({e}), retry {attempt + 1}/"
+                f"{max_retries} in {delay:.1f}s",
+            )
+            time.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+def existing_point_ids(
+    client: QdrantClient,
+    collection_name: str,
+    book_id: str,
+    page_size: int = 1000,
+) -> set[str]:
+    """Return the IDs of the points of one book already in the collection."""
+    ids = set()
+    offset = None
+    while True:
+        points, offset = with_retries(
+            partial(
+                client.scroll,
+                collection_name,
+                scroll_filter=Filter(
+                    must=[
+                        FieldCondition(
+                            key="book_id",
+                            match=MatchValue(value=book_id),
+                        ),
+                    ],
+                ),
+                limit=page_size,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            ),
+            f"Listing the points of {book_id}",
+        )
+        ids.update(str(point.id) for point in points)
+        if offset is None:
+            return ids
+
+
+def stored_book_ids(
+    client: QdrantClient,
+    collection_name: str,
+    page_size: int = 1000,
+) -> set[str]:
+    """Return the IDs of every book with points in the collection."""
+    book_ids = set()
+    offset = None
+    while True:
+        points, offset = with_retries(
+            partial(
+                client.scroll,
+                collection_name,
+                limit=page_size,
+                offset=offset,
+                with_payload=["book_id"],
+                with_vectors=False,
+            ),
+            "Listing the stored books",
+        )
+        book_ids.update(point.payload["book_id"] for point in points if point.payload.get("book_id"))
+        if offset is None:
+            return book_ids
+
+
+def batched(items: Iterable, batch_size: int) -> Iterator[list]:
+    """Group items into lists of at most ``batch_size``."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+@dataclass
+class UploadStats:
+    """Counters of one upload run."""
+
+    loaded: int = 0
+    unchanged: int = 0
+    upserted: int = 0
+    deleted: int = 0
+    seconds: float = 0.0
+
+    @property
+    def points_per_second(self) -> float:
+        """Upserted points per second."""
+        return self.upserted / self.seconds if self.seconds else 0.0
+
+
+class PointDiff:
+    """Streaming diff of incoming points against the stored ones, by book.
+
+    Only point IDs are kept in memory, never vectors. The stored IDs of a
+    book are listed the first time one of its points comes in.
+    """
+
+    def __init__(self, client: QdrantClient, collection_name: str) -> None:
+        self.client = client
+        self.collection_name = collection_name
+        self.existing: dict[str, set[str]] = {}
+        self.seen: dict[str | None, set[str]] = {}
+
+    def changed(
+        self,
+        points: Iterable[PointStruct],
+        stats: UploadStats,
+    ) -> Iterator[PointStruct]:
+        """Yield the points that are not stored yet under the same ID."""
+        for point in points:
+            book_id = point.payload["book_id"]
+            # Points with a malformed page_id have no book to diff against
+            if book_id and book_id not in self.existing:
+                self.existing[book_id] = existing_point_ids(
+                    self.client,
+                    self.collection_name,
+                    book_id,
+                )
+            seen = self.seen.setdefault(book_id, set())
+            if point.id in seen:
+                continue
+            seen.add(point.id)
+            stats.loaded += 1
+            if point.id in self.existing.get(book_id, ()):
+                stats.unchanged += 1
+                continue
+            yield point
+
+    def remove_missing_books(self) -> None:
+        """Mark every point of the stored books that did not come in as stale."""
+        for book_id in stored_book_ids(self.client, self.collection_name) - self.seen.keys():
+            self.existing[book_id] = existing_point_ids(self.client, self.collection_name, book_id)
+
+    def stale(self) -> dict[str, list[str]]:
+        """Return the stored IDs of every diffed book that did not come in."""
+        return {
+            book_id: sorted(ids - self.seen.get(book_id, set()))
+            for book_id, ids in self.existing.items()
+        }
+
+
+class UpsertWorkers:
+    """Threads upserting batches taken from a bounded queue.
+
+    The queue has ``2 * workers`` slots. Handing over the next batch blocks
+    while it is full, so memory stays flat however large the input is.
+    """
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        collection_name: str,
+        stats: UploadStats,
+        workers: int = UPLOAD_WORKERS,
+    ) -> None:
+        self.client = client
+        self.collection_name = collection_name
+        self.stats = stats
+        self.workers = workers
+        self._pending: queue.Queue[list[PointStruct] | None] = queue.Queue(
+            maxsize=2 * workers,
+        )
+        self._lock = threading.Lock()
+        self._errors: list[Exception] = []
+
+    def _run(self) -> None:
+        """Upsert batches until the end-of-input marker comes in."""
+        while (batch := self._pending.get()) is not None:
+            # After a failure the remaining batches are drained, not sent
+            if self._errors:
+                continue
+            try:
+                with_retries(
+                    partial(
+                        self.client.upsert,
+                        collection_name=self.collection_name,
+                        points=batch,
+                    ),
+                    f"Upserting {len(batch)} points",
+                )
+            except Exception as e:
+                logger.error(f"Upserting {len(batch)} points failed: {e}")
+                self._errors.append(e)
+                continue
+            with self._lock:
+                self.stats.upserted += len(batch)
+
+    def upload(self, batches: Iterable[list[PointStruct]]) -> None:
+        """Upsert every batch and wait for the workers to finish."""
+        threads = [
+            threading.Thread(target=self._run, daemon=True)
+            for _ in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for batch in batches:
+                if self._errors:
+                    break
+                self._pending.put(batch)
+        finally:
+            for _ in threads:
+                self._pending.put(None)
+            for thread in threads:
+                thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+
 def upload_data_to_qdrant(
     client: QdrantClient,
     collection_name: str,
-    points: list[PointStruct],
+    points: Iterable[PointStruct],
     batch_size: int = BATCH_SIZE,
     force_recreate_collection: bool = False,
-) -> None:
-    """Upload points to Qdrant in batches."""
+    workers: int = UPLOAD_WORKERS,
+    delete_missing_books: bool = True,
+) -> UploadStats:
+    """Stream points into the collection with concurrent upsert workers.
+
+    Points already stored under the same ID are skipped, new or edited ones
+    are upserted, and stored points that are no longer in ``points`` are
+    deleted at the end, including every point of books that are gone. With
+    ``delete_missing_books=False``, books without points in the input are
+    left untouched, so re-indexing one book only touches that book.
+    """
     create_collection(
         client,
         collection_name,
         force_recreate=force_recreate_collection,
     )
 
-    for i in tqdm(range(0, len(points), batch_size), desc="Uploading points"):
-        batch = points[i:i + batch_size]
-        client.upsert(
-            collection_name=collection_name,
-            points=batch,
-        )
+    stats = UploadStats()
+    diff = PointDiff(client, collection_name)
+    start_time = time.perf_counter()
+    UpsertWorkers(client, collection_name, stats, workers).upload(
+        batched(diff.changed(points, stats), batch_size),
+    )
+    stats.seconds = time.perf_counter() - start_time
+
+    if delete_missing_books:
+        diff.remove_missing_books()
+    for book_id, stale_ids in diff.stale().items():
+        for ids in batched(stale_ids, batch_size):
+            with_retries(
+                partial(
+                    client.delete,
+                    collection_name=collection_name,
+                    points_selector=PointIdsList(points=ids),
+                ),
+                f"Deleting {len(ids)} points of {book_id}",
+            )
+        stats.deleted += len(stale_ids)
+
     logger.info(
-        f"Uploaded {len(points)} points to collection '{collection_name}'",
+        f"Synced {stats.loaded} points to collection '{collection_name}': "
+        f"{stats.unchanged} unchanged, {stats.upserted} upserted, "
+        f"{stats.deleted} deleted in {stats.seconds:.1f}s "
+        f"({stats.points_per_second:.0f} points/s with {workers} workers)",
     )
+    return stats
 
 
 def main() -> None:
@@ -143,28 +548,30 @@ def main() -> None:
         f"force_recreate={force_recreate}",
     )
 
-    json_files = list(BASE_JSONL_EMBEDDINGS_DIR.glob("*.jsonl"))
-    logger.info(
-        f"Processing {len(json_files)} JSONL files in "
-        f"{BASE_JSONL_EMBEDDINGS_DIR}",
-    )
-    all_points = []
-    for json_file in json_files:
-        logger.info(f"Loading points from {json_file.name}")
-        points = load_points_from_jsonl(json_file)
-        all_points.extend(points)
-    logger.info(f"Total points loaded: {len(all_points)}")
-
-    if not all_points:
-        logger.warning("No points to upload. Exiting.")
-        return
-
+    # Points are read lazily as the workers catch up
+    if EmbeddingStore.exists(EMBEDDING_STORE_PATH):
+        logger.info(f"Processing the embedding store in {EMBEDDING_STORE_PATH}")
+        points = iter_points_from_store(EMBEDDING_STORE_PATH)
+    else:
+        # JSONL files with inline embeddings, written by older embedders
+        json_files = sorted(BASE_JSONL_EMBEDDINGS_DIR.glob("*.jsonl"))
+        logger.info(
+            f"Processing {len(json_files)} JSONL files in "
+            f"{BASE_JSONL_EMBEDDINGS_DIR}",
+        )
+        if not json_files:
+            logger.warning("No points to upload. Exiting.")
+            return
+        points = chain.from_iterable(
+            iter_points_from_jsonl(json_file) for json_file in json_files
+        )
     upload_data_to_qdrant(
         client,
         collection_name,
-        all_points,
+        points,
         batch_size=BATCH_SIZE,
         force_recreate_collection=force_recreate,
+        workers=UPLOAD_WORKERS,
     )
 
 